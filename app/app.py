@@ -1,23 +1,113 @@
-from flask import Flask,render_template,redirect,url_for,request
+from flask import Flask,render_template,request,Response,stream_with_context
 import os
-import uuid
-import pandas as pd
+import functools
+import hashlib
 import numpy as np
 import json
-import pickle
-from datetime import datetime
 
 import sys
+import tempfile
+import threading
+import time
 path=os.path.dirname(os.path.realpath(__file__))
 sys.path.append(path + '/../src')
 from mdp import MDP
-from grid_world import make_grid_world
+from layout_cache import LayoutCache
+from result_cache import ResultCache
+from instrumentation import SolverStats, NULL_STATS
+import grid_world
+from sessions import SessionStore
 
 
 app=Flask(__name__)
-with open(path + '/secret_key.txt') as f:
-    app.secret_key= f.read()
+# the key is kept out of the repository; without secret_key.txt or
+# MDP_SECRET_KEY a random key is generated for each process
+if os.path.exists(path + '/secret_key.txt'):
+    with open(path + '/secret_key.txt') as f:
+        app.secret_key= f.read()
+else:
+    app.secret_key= os.environ.get('MDP_SECRET_KEY') or os.urandom(24)
+    
+# solver and request timings served at /metrics when MDP_METRICS=1
+solver_stats = SolverStats() if os.environ.get('MDP_METRICS') == '1' else NULL_STATS
+# step requests rebuild the MDP from the client's state on every call
+mdp_cache = LayoutCache(maxsize=32, stats=solver_stats)
+# solved demo and session MDPs, kept on disk across restarts
+result_cache = ResultCache(os.environ.get('MDP_RESULT_CACHE',
+                           os.path.join(tempfile.gettempdir(), 'mdp_results')))
+# live MDPs of clients using the /session endpoints
+sessions = SessionStore(ttl=1800)
+# rendered demo pages and their ETags, by endpoint
+page_cache = {}
+cache_pages = os.environ.get('MDP_CACHE_PAGES', '1') == '1'
+
+
+
+def make_grid_world(*args, **kwargs):
+    
+    with solver_stats.phase('render'):
+        return grid_world.make_grid_world(*args, **kwargs)
+
+
+@app.before_request
+def start_timer():
+    
+    request.start_time = time.perf_counter()
     
+    
+@app.after_request
+def record_request(response):
+    
+    if solver_stats.enabled and request.endpoint is not None:
+        solver_stats.add_time('request:' + request.endpoint,
+                              time.perf_counter() - request.start_time)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    
+    if not solver_stats.enabled:
+        return "metrics are disabled, set MDP_METRICS=1\n", 404
+    text = solver_stats.to_prometheus()
+    for cache, cache_stats in (('layout_cache', mdp_cache.stats()),
+                               ('result_cache', result_cache.stats())):
+        for name in ('hits', 'misses', 'evictions'):
+            text += f"# TYPE mdp_{cache}_{name}_total counter\n"
+            text += f"mdp_{cache}_{name}_total {cache_stats[name]}\n"
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+
+"""
+Serve the page rendered by view from page_cache, rendering it on the first
+request. The demo pages only depend on constants, so they are the same for
+every request; clients revalidate them with ETags
+"""
+def cached_page(view):
+    
+    @functools.wraps(view)
+    def wrapper():
+        if not cache_pages:
+            return view()
+        if view.__name__ not in page_cache:
+            body = view()
+            page_cache[view.__name__] = (
+                    body, hashlib.sha1(body.encode()).hexdigest())
+        body, etag = page_cache[view.__name__]
+        response = Response(body, mimetype='text/html')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+    return wrapper
+
+
+"""
+Render every cached demo page, e.g. before serving requests
+"""
+def precompute_pages():
+    
+    for view in (index, value_iteration, policy_iteration):
+        with app.test_request_context():
+            view()
 
 
 def get_mdp(request):
@@ -32,12 +122,13 @@ def get_mdp(request):
     values = np.array(data['values'])
     policy = np.array(data['policy'])
     
-    mdp = MDP(state_rewards_dict, blocked_states_list,
+    mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
                      discount, size, values, policy)
     return mdp
 
     
 @app.route('/policy_iteration_example', methods=['GET', 'POST'])
+@cached_page
 def policy_iteration_example():
     
     
@@ -49,7 +140,7 @@ def policy_iteration_example():
     np.random.seed(443209)
     policy = np.random.randint(0,4, size=size**2)
     mdp = MDP(state_rewards_dict, blocked_states_list,
-                     discount, size=size, policy=policy)        
+                     discount, size=size, policy=policy, stats=solver_stats)        
 
     value_table1 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list)
     policy_table1 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list, show_policy=True)
@@ -69,7 +160,7 @@ def policy_iteration_example():
     mdp.policy_improvement()
     policy_table3 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list, show_policy=True)
     
-    mdp.policy_iteration()
+    result_cache.solve(mdp, 'policy_iteration')
     value_table4 = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list)
     policy_table4 = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list, show_policy=True)
     
@@ -93,6 +184,7 @@ def policy_iteration_example():
 
 
 @app.route('/', methods=['GET', 'POST'])
+@cached_page
 def index():
     
     
@@ -102,7 +194,7 @@ def index():
                            (5, 2), (6, 2), (7, 2), (8, 2), (8, 3), (8, 4)]
     discount=.9
     mdp = MDP(state_rewards_dict, blocked_states_list,
-                     discount, size=size)
+                     discount, size=size, stats=solver_stats)
         
     table = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list)
     state_rewards_list = [[list(k),v] for k,v in state_rewards_dict.items()]
@@ -133,10 +225,10 @@ def update():
     
     print(blocked_states_list)
     if started:
-        mdp = MDP(state_rewards_dict, blocked_states_list,
+        mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
                      discount, size, values, policy)
     else:
-        mdp = MDP(state_rewards_dict, blocked_states_list,
+        mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
                      discount, size)
     table = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy,
                             mdp.blocked_states_list)
@@ -147,6 +239,7 @@ def update():
 
     
 @app.route('/value_iteration', methods=['GET','POST'])
+@cached_page
 def value_iteration():
     
     size = 5
@@ -154,7 +247,7 @@ def value_iteration():
     blocked_states_list = [(2,3), (2,4), (2,2)]
     discount=.9
     mdp = MDP(state_rewards_dict, blocked_states_list,
-                     discount, size=size)
+                     discount, size=size, stats=solver_stats)
         
     table1 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list)
     
@@ -169,7 +262,7 @@ def value_iteration():
     table4 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list)
     
     
-    mdp.value_iteration()
+    result_cache.solve(mdp, 'value_iteration')
     table5 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list)
     value_table6 = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list)
     policy_table6 = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list,
@@ -181,7 +274,7 @@ def value_iteration():
                            (5, 2), (6, 2), (7, 2), (8, 2), (8, 3), (8, 4)]
     discount=.9
     mdp = MDP(state_rewards_dict, blocked_states_list,
-                     discount, size=size)
+                     discount, size=size, stats=solver_stats)
     
     table = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list)
     state_rewards_list = [[list(k),v] for k,v in state_rewards_dict.items()]
@@ -215,7 +308,7 @@ def value_iteration_step():
     values = np.array(data['values'])
     policy = np.array(data['policy'])
     
-    mdp = MDP(state_rewards_dict, blocked_states_list,
+    mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
                      discount, size, values, policy)
     
     mdp.values = mdp.evaluate_values()
@@ -241,7 +334,7 @@ def value_iteration_show_policy():
     values = np.array(data['values'])
     policy = np.array(data['policy'])
     
-    mdp = MDP(state_rewards_dict, blocked_states_list,
+    mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
                      discount, size, values, policy)
     
     table = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list, show_policy=True)
@@ -251,6 +344,7 @@ def value_iteration_show_policy():
     
     
 @app.route('/policy_iteration', methods=['GET','POST'])
+@cached_page
 def policy_iteration():
     
     size = 5
@@ -261,7 +355,7 @@ def policy_iteration():
     np.random.seed(443209)
     policy = np.random.randint(0,4, size=size**2)
     mdp = MDP(state_rewards_dict, blocked_states_list,
-                     discount, size=size, policy=policy)        
+                     discount, size=size, policy=policy, stats=solver_stats)        
 
     value_table1 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list)
     policy_table1 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list, show_policy=True)
@@ -281,7 +375,7 @@ def policy_iteration():
     mdp.policy_improvement()
     policy_table3 = make_grid_world(mdp.states, mdp.values, mdp.policy, mdp.blocked_states_list, show_policy=True)
     
-    mdp.policy_iteration()
+    result_cache.solve(mdp, 'policy_iteration')
     value_table4 = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list)
     policy_table4 = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list, show_policy=True)
         
@@ -291,7 +385,7 @@ def policy_iteration():
                            (5, 2), (6, 2), (7, 2), (8, 2), (8, 3), (8, 4)]
     discount=.9
     mdp = MDP(state_rewards_dict, blocked_states_list,
-                     discount, size=size)
+                     discount, size=size, stats=solver_stats)
     
     table = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy, mdp.blocked_states_list, show_policy=True)
     state_rewards_list = [[list(k),v] for k,v in state_rewards_dict.items()]
@@ -328,7 +422,7 @@ def policy_iteration_step():
     values = np.array(data['values'])
     policy = np.array(data['policy'])
     
-    mdp = MDP(state_rewards_dict, blocked_states_list,
+    mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
                      discount, size, values, policy)
     mdp.values = mdp.evaluate_policy_values()
     
@@ -351,7 +445,7 @@ def policy_improvement():
     values = np.array(data['values'])
     policy = np.array(data['policy'])
     
-    mdp = MDP(state_rewards_dict, blocked_states_list,
+    mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
                      discount, size, values, policy)
     stable = mdp.policy_improvement()
     
@@ -362,7 +456,151 @@ def policy_improvement():
             'policy': mdp.policy.tolist()})
     
     
+@app.route('/session', methods=['POST'])
+def create_session():
+    
+    data = json.loads(request.data)
+    size = data['size']
+    state_rewards_list = data['state_rewards_list']
+    state_rewards_dict = {tuple(k):v for k,v in state_rewards_list}
+    blocked_states_list = [tuple(s) for s in data['blocked_states_list']]
+    discount = data['discount']
+    
+    values = np.array(data['values']) if 'values' in data else None
+    policy = np.array(data['policy']) if 'policy' in data else None
+    
+    mdp = mdp_cache.get_mdp(state_rewards_dict, blocked_states_list,
+                     discount, size, values, policy)
+    # requests on one session are serialized by its lock; the colors and
+    # labels last sent let steps send only the cells whose rendering changed
+    session_id = sessions.create({'mdp': mdp, 'lock': threading.Lock(),
+                                  'colors': None, 'labels': None})
+    
+    table = make_grid_world(mdp.states, mdp.get_total_rewards(), mdp.policy,
+                            mdp.blocked_states_list)
+    return json.dumps({'session_id': session_id, 'table': table,
+            'values': mdp.values.tolist(), 'policy': mdp.policy.tolist()})
+    
+    
+"""
+Render the grid world of a session and return the cells whose color or
+label differ from the previous render, every cell on the first one
+Parameters:
+    dict entry: session entry as stored by create_session
+    str show: 'total_rewards' or 'values', the quantity shown in each cell
+    bool show_policy: label cells with their action rather than their value
+Returns:
+    list of [x, y, color, label]
+"""
+def render_changes_(entry, show, show_policy):
+    
+    mdp = entry['mdp']
+    shown = mdp.get_total_rewards() if show == 'total_rewards' else mdp.values
+    with solver_stats.phase('render'):
+        colors, labels = grid_world.get_cells(
+                mdp.states, shown, mdp.policy, mdp.blocked_states_list,
+                show_policy)
+    if entry['colors'] is None:
+        changed = np.ones(colors.shape, dtype=bool)
+    else:
+        changed = (colors != entry['colors']) | (labels != entry['labels'])
+    entry['colors'], entry['labels'] = colors, labels
+    ys, xs = np.nonzero(changed)
+    return [[int(x), int(y), colors[y, x], labels[y, x]]
+            for x, y in zip(xs, ys)]
+    
+    
+def value_iteration_step_(mdp):
+    
+    mdp.values = mdp.evaluate_values()
+    mdp.policy = mdp.optimize_policy()
+    
+    
+def policy_evaluation_step_(mdp):
+    
+    mdp.values = mdp.evaluate_policy_values()
+    
+    
+# name: (operation, quantity shown, show policy), rendered as by the
+# matching stateless endpoint
+session_operations = {
+    'value_iteration_step': (value_iteration_step_, 'total_rewards', False),
+    'show_policy': (lambda mdp: None, 'total_rewards', True),
+    'policy_evaluation_step': (policy_evaluation_step_, 'values', False),
+    'policy_improvement': (lambda mdp: mdp.policy_improvement(), 'values',
+                           True),
+    'value_iteration': (lambda mdp: result_cache.solve(mdp, 'value_iteration'),
+                        'total_rewards', False),
+    'policy_iteration': (lambda mdp: result_cache.solve(mdp, 'policy_iteration'),
+                         'total_rewards', True),
+}
+    
+    
+@app.route('/session/<session_id>/<operation>', methods=['POST'])
+def session_step(session_id, operation):
+    
+    entry = sessions.get(session_id)
+    if entry is None:
+        return json.dumps({'error': 'unknown or expired session'}), 404
+    if operation not in session_operations:
+        return json.dumps({'error': f"unknown operation '{operation}'"}), 400
+    
+    operate, show, show_policy = session_operations[operation]
+    with entry['lock']:
+        mdp = entry['mdp']
+        prev_values = np.array(mdp.values, copy=True)
+        prev_policy = np.array(mdp.policy, copy=True)
+        operate(mdp)
+        
+        changed = np.flatnonzero((mdp.values != prev_values)
+                                 | (mdp.policy != prev_policy))
+        return json.dumps({'cells': mdp.states[changed].tolist(),
+                'values': mdp.values[changed].tolist(),
+                'policy': mdp.policy[changed].tolist(),
+                'rendered': render_changes_(entry, show, show_policy)})
+    
+    
+session_streams = {
+    'value_iteration': lambda mdp, **kw: mdp.iter_value_iteration(**kw),
+    'policy_evaluation': lambda mdp, **kw: mdp.iter_policy_evaluation(**kw),
+    'policy_iteration': lambda mdp, **kw: mdp.iter_policy_iteration(**kw),
+}
+
+
+@app.route('/session/<session_id>/stream/<algorithm>', methods=['GET'])
+def session_stream(session_id, algorithm):
+    
+    entry = sessions.get(session_id)
+    if entry is None:
+        return json.dumps({'error': 'unknown or expired session'}), 404
+    if algorithm not in session_streams:
+        return json.dumps({'error': f"unknown algorithm '{algorithm}'"}), 400
+    max_iters = request.args.get('max_iters', 100, type=int)
+    
+    def events():
+        # the session's MDP is held for the whole stream
+        with entry['lock']:
+            mdp = entry['mdp']
+            for snapshot in session_streams[algorithm](
+                    mdp, max_iters=max_iters, deltas=True):
+                changed, values = snapshot.pop('delta')
+                snapshot['cells'] = mdp.states[changed].tolist()
+                snapshot['values'] = values.tolist()
+                yield f"data: {json.dumps(snapshot)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return Response(stream_with_context(events()),
+                    mimetype='text/event-stream')
+    
+    
+@app.route('/session/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    
+    sessions.delete(session_id)
+    return json.dumps({})
+    
 
 
 if __name__=="__main__":
+    precompute_pages()
     app.run()
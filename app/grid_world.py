@@ -1,69 +1,123 @@
 from colour import Color
-import collections
-import bisect
+import functools
 import numpy as np
 
 
+"""
+Return n hex colors evenly spaced from red to green. Cached per n so the
+Color objects are only created once per process
+Parameters:
+    int n: number of colors
+Returns:
+    array of n hex strings
+"""
+@functools.lru_cache(maxsize=None)
+def get_palette(n):
+    
+    red = Color("red")
+    palette = np.array([c.hex for c in red.range_to(Color("green"), n)],
+                       dtype=object)
+    palette.flags.writeable = False
+    return palette
+
+
 class ColorMap:
     
     def __init__(self, min_reward, max_reward, n=100):
         
-        red = Color("red")
-        colors = list(red.range_to(Color("green"),n))
-        reward_range = np.linspace(min_reward, max_reward, num=n)
+        self.palette = get_palette(n)
+        self.keys = np.linspace(min_reward, max_reward, num=n)
+        # a key repeated by linspace maps to the color of its last occurrence
+        self.last_index = np.searchsorted(self.keys, self.keys, side='right') - 1
         
-        self.color_map = collections.OrderedDict(
-                {reward_range[i]:colors[i].hex for i in range(n)}
-        )
+    
+    """
+    Map an array of values to the color of the nearest key in one pass
+    Parameters:
+        array values: values between min_reward and max_reward; values
+                      outside are clamped
+    Returns:
+        array of hex strings with the same shape as values
+    """
+    def get_colors(self, values):
         
+        keys = self.keys
+        values = np.clip(np.asarray(values, dtype=float), keys[0], keys[-1])
+        idx = np.searchsorted(keys, values, side='left')
+        upper = np.minimum(idx, len(keys)-1)
+        lower = np.maximum(idx-1, 0)
+        nearest = np.where(
+                np.abs(keys[upper]-values) < np.abs(keys[lower]-values),
+                upper, lower
+            )
+        nearest = np.where(keys[upper] == values, upper, nearest)
+        return self.palette[self.last_index[nearest]]
+    
     
     def get_color(self, value):
         
-        if value in self.color_map:
-            return self.color_map[value]
-        keys = list(self.color_map.keys())
-        value = max(min(max(keys),value), min(keys))
-        idx = bisect.bisect_left(keys, value)
-
-        if abs(keys[idx]-value) < abs(keys[idx-1]-value):
-            key = keys[idx]
-        else:
-            key = keys[idx-1]
-        return self.color_map[key]
+        return self.get_colors(np.array([value]))[0]
 
     
     
-def make_grid_world(states, total_rewards, policy, blocked_states_list,
-                    show_policy=False, n=100):
-    
+POLICY_LABELS = np.array(['&larr;', '&rarr;', '&uarr;', '&darr;', 'X'])
+CELL = "<td align='center' id='{}{}' style='background-color:{}'>{}</td>"
+
+
+"""
+Return the background color and label of every cell of the grid world
+table, with blocked cells gray and unlabelled
+Parameters:
+    array states: (#states, 2) array of x,y coordinates
+    array total_rewards: value shown in each state, colored on a scale from
+                         its minimum to its maximum
+    array policy: action of each state, shown instead of the values if
+                  show_policy
+    list blocked_states_list: each element is an x,y pair of a blocked state
+    bool show_policy: label cells with their action rather than their value
+    int n: number of colors of the scale
+Returns:
+    tuple (colors, labels) of (size, size) arrays of strings, where [y][x]
+    is the cell of the state at x,y
+"""
+def get_cells(states, total_rewards, policy, blocked_states_list,
+              show_policy=False, n=100):
     
+    total_rewards = np.asarray(total_rewards)
     min_reward = total_rewards.min()
     max_reward = total_rewards.max()
     color_map = ColorMap(min_reward, max_reward, n)
-    colors = [color_map.get_color(r) for r in total_rewards]    
-    rounded_total_rewards = np.round(total_rewards,2)
-    
-    rewards_dict = {tuple(states[i]): rounded_total_rewards[i] for i in range(len(states))}
-    colors_dict = {tuple(states[i]): colors[i] for i in range(len(states))}
-    policy_dict = {tuple(states[i]): policy[i] for i in range(len(states))}
+    colors = color_map.get_colors(total_rewards)
+    if show_policy:
+        labels = POLICY_LABELS[np.asarray(policy, dtype=int)].astype(object)
+    else:
+        labels = np.round(total_rewards,2).astype(str).astype(object)
     
     size = int(np.sqrt(len(total_rewards)))
-    grid = "<table>"
-    grid_num = 0
-    for j in range(size):
-        grid += "<tr>"; 
-        for i in range(size):
-            if (i,j) in blocked_states_list:
-                val = ''
-                color = 'gray'
-            elif show_policy:
-                val = ['&larr;', '&rarr;', '&uarr;', '&darr;', 'X'][policy_dict[(i,j)]]
-                color = colors_dict[(i,j)]
-            else:
-                val = rewards_dict[(i,j)]
-                color = colors_dict[(i,j)]
-            grid += f"<td align='center' id='{i}{j}' style='background-color:{color}'>{val}</td>"
-            grid_num += 1
-        grid += "</tr>"
-    grid += '</table>'
-    return grid
\ No newline at end of file
+    blocked = np.zeros((size, size), dtype=bool)
+    if len(blocked_states_list):
+        blocked_states = np.asarray(blocked_states_list).reshape(-1, 2)
+        inside = ((blocked_states >= 0) & (blocked_states < size)).all(axis=1)
+        blocked[tuple(blocked_states[inside].T)] = True
+    
+    # grid[i][j] is the index of the state at x=i, y=j; rows of the table
+    # run over y
+    grid = np.empty((size, size), dtype=int)
+    grid[states[:,0], states[:,1]] = np.arange(len(states))
+    colors = np.where(blocked, 'gray', colors[grid]).T
+    labels = np.where(blocked, '', labels[grid]).T
+    return colors, labels
+
+
+def make_grid_world(states, total_rewards, policy, blocked_states_list,
+                    show_policy=False, n=100):
+    
+    
+    colors, labels = get_cells(states, total_rewards, policy,
+                               blocked_states_list, show_policy, n)
+    rows = [
+        "<tr>" + "".join([CELL.format(i, j, color, label) for i, (color, label)
+                          in enumerate(zip(colors[j], labels[j]))]) + "</tr>"
+        for j in range(len(colors))
+    ]
+    return "<table>" + "".join(rows) + "</table>"
\ No newline at end of file
@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+
+
+class InMemoryBackend:
+
+    """
+    Session backend keeping entries in a dict of this process. Any object
+    with the same get/set/delete/keys methods can be used instead, e.g. to
+    bound the number of sessions. Entries are stored as they are, live
+    solver objects and locks included, and last access times come from
+    this process's monotonic clock, so a backend must keep them in this
+    process rather than serialize them to a shared store
+    """
+    def __init__(self):
+
+        self.entries = {}
+
+
+    def get(self, session_id):
+
+        return self.entries.get(session_id)
+
+
+    def set(self, session_id, entry):
+
+        self.entries[session_id] = entry
+
+
+    def delete(self, session_id):
+
+        self.entries.pop(session_id, None)
+
+
+    def keys(self):
+
+        return list(self.entries)
+
+
+class SessionStore:
+
+    """
+    Server-side store of live solver objects keyed by session id, so that
+    clients can step a solver by id instead of sending its state back and
+    forth. Sessions that have not been accessed for ttl seconds are evicted
+    Parameters:
+        float ttl: seconds a session is kept after its last access
+        backend: in-process object with get, set, delete and keys methods,
+                 see InMemoryBackend; defaults to an InMemoryBackend
+    """
+    def __init__(self, ttl=1800, backend=None):
+
+        self.ttl = ttl
+        self.backend = InMemoryBackend() if backend is None else backend
+        self.lock = threading.Lock()
+
+
+    """
+    Store a new session
+    Parameters:
+        obj: object to keep for the session, e.g. an MDP
+    Returns:
+        str session id
+    """
+    def create(self, obj):
+
+        session_id = uuid.uuid4().hex
+        with self.lock:
+            self.expire_()
+            self.backend.set(session_id, (time.monotonic(), obj))
+        return session_id
+
+
+    """
+    Return the object of a session and refresh its last access time
+    Parameters:
+        str session_id: id returned by create
+    Returns:
+        stored object, or None if the session does not exist or expired
+    """
+    def get(self, session_id):
+
+        with self.lock:
+            self.expire_()
+            entry = self.backend.get(session_id)
+            if entry is None:
+                return None
+            self.backend.set(session_id, (time.monotonic(), entry[1]))
+            return entry[1]
+
+
+    def delete(self, session_id):
+
+        with self.lock:
+            self.backend.delete(session_id)
+
+
+    """
+    Remove sessions that have not been accessed for ttl seconds
+    """
+    def expire_(self):
+
+        now = time.monotonic()
+        for session_id in self.backend.keys():
+            entry = self.backend.get(session_id)
+            if entry is not None and now - entry[0] > self.ttl:
+                self.backend.delete(session_id)
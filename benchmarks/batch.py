@@ -0,0 +1,54 @@
+"""
+Solving many reward/discount variants of one layout: a loop of MDP
+constructions plus value_iteration against a single solve_batch call.
+
+    python benchmarks/batch.py [--size 20] [--batch 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--algorithm', default='value_iteration')
+    args = parser.parse_args()
+    
+    size = args.size
+    _, blocked_states_list = example_mdp_args(size)
+    rng = np.random.default_rng(0)
+    dicts = [{(int(x), int(y)): 1.0} for x, y in
+             rng.integers(size, size=(args.batch, 2))]
+    discounts = rng.uniform(.5, .99, size=args.batch)
+    
+    start = time.perf_counter()
+    for state_rewards_dict, discount in zip(dicts, discounts):
+        mdp = MDP(state_rewards_dict, blocked_states_list, discount, size)
+        getattr(mdp, args.algorithm)()
+    loop_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    layout = MDP({}, blocked_states_list, 1, size)
+    reward_matrix = np.stack([
+            layout.get_rewards_(layout.states, layout.actions, d)
+            for d in dicts
+        ])
+    _, _, iterations = layout.solve_batch(reward_matrix, discounts,
+                                          args.algorithm)
+    batch_seconds = time.perf_counter() - start
+    
+    print(f"{args.batch} MDPs of size {size}, {args.algorithm}")
+    print(f"loop:  {loop_seconds:8.3f}s  {args.batch/loop_seconds:10.1f} MDPs/s")
+    print(f"batch: {batch_seconds:8.3f}s  {args.batch/batch_seconds:10.1f} MDPs/s"
+          f"  (mean iterations {iterations.mean():.1f})")
+
+
+if __name__ == '__main__':
+    main()
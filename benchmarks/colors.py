@@ -0,0 +1,40 @@
+"""
+Per-cell cost of mapping values to colors with ColorMap, one call per cell
+against one vectorized call for the whole grid.
+
+    python benchmarks/colors.py [--sizes 10 100 300]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from common import best_time, path
+
+sys.path.append(os.path.join(path, '..', 'app'))
+from grid_world import ColorMap
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--n', type=int, default=100)
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'init us':>8} {'per call ns/cell':>17} "
+          f"{'vectorized ns/cell':>19}")
+    for size in args.sizes:
+        values = np.random.default_rng(0).random(size**2)
+        init = best_time(lambda: ColorMap(0, 1, args.n), number=100)
+        color_map = ColorMap(0, 1, args.n)
+        per_call = best_time(lambda: [color_map.get_color(v) for v in values],
+                             repeat=3)
+        vectorized = best_time(lambda: color_map.get_colors(values))
+        print(f"{size:>6} {init*1e6:>8.1f} {per_call/size**2*1e9:>17.1f} "
+              f"{vectorized/size**2*1e9:>19.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import os
+import sys
+import timeit
+
+path = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(path + '/../src')
+
+
+"""
+Return the best wall-clock time in seconds of calling fn number times, over
+repeat runs
+"""
+def best_time(fn, repeat=5, number=1):
+    
+    return min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+
+
+"""
+Return (state_rewards_dict, blocked_states_list) for a size x size grid with
+two reward cells and a random fraction density of blocked cells
+"""
+def example_mdp_args(size, density=.1, seed=0):
+    
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    state_rewards_dict = {(size//2, size//2): 1, (0, 0): 1}
+    cells = rng.choice(size**2, size=int(density*size**2), replace=False)
+    blocked_states_list = [(int(c)//size, int(c)%size) for c in cells
+                           if (int(c)//size, int(c)%size) not in state_rewards_dict]
+    return state_rewards_dict, blocked_states_list
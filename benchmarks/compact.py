@@ -0,0 +1,67 @@
+"""
+Memory and throughput of the compact integer dtypes and float32 values
+against the default int64/float64 representation.
+
+That their solutions match the default ones is checked by
+tests/test_compact.py.
+
+    python benchmarks/compact.py [--sizes 50 200 500] [--discount .95]
+"""
+import argparse
+
+import numpy as np
+
+from common import best_time, example_mdp_args
+from mdp import MDP
+
+
+MODES = {
+    'default': {},
+    'float32': {'dtype': np.float32},
+    'compact': {'compact': True},
+    'compact float32': {'compact': True, 'dtype': np.float32},
+}
+
+SOLVERS = {
+    'jacobi': lambda mdp: mdp.value_iteration(200, 1e-6),
+    'gauss-seidel': lambda mdp: mdp.value_iteration(200, 1e-6,
+                                                    method='gauss-seidel'),
+    'frontier': lambda mdp: mdp.value_iteration(200, 1e-6, method='frontier'),
+    'policy_iteration': lambda mdp: mdp.policy_iteration(method='direct'),
+}
+
+
+def get_bytes(mdp):
+    
+    layout = sum(array.nbytes for array in mdp.layout.values())
+    return layout + mdp.values.nbytes + mdp.rewards.nbytes + mdp.policy.nbytes
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--discount', type=float, default=.95)
+    args = parser.parse_args()
+    
+    print(f"{'size':>5} {'mode':>16} {'MB':>7} {'sweep ms':>9} "
+          f"{'solver':>17} {'ms':>8}")
+    for size in args.sizes:
+        mdp_args = example_mdp_args(size)
+        for mode, kwargs in MODES.items():
+            np.random.seed(0)
+            mdp = MDP(*mdp_args, args.discount, size, **kwargs)
+            megabytes = get_bytes(mdp) / 2**20
+            sweep = best_time(mdp.evaluate_values, 5)
+            for solver, solve in SOLVERS.items():
+                if size > 200 and solver == 'policy_iteration':
+                    continue
+                np.random.seed(0)
+                mdp = MDP(*mdp_args, args.discount, size, **kwargs)
+                seconds = best_time(lambda: solve(mdp), 1)
+                print(f"{size:>5} {mode:>16} {megabytes:>7.2f} "
+                      f"{sweep*1e3:>9.2f} {solver:>17} {seconds*1e3:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Solving connected components after reachability pruning against full solves.
+
+Reports the components, solved and pruned states and the time of
+solve_components next to solving the full grid, over obstacle densities.
+That both solves give equally good policies is checked by
+tests/test_components.py.
+
+    python benchmarks/component_solve.py [--sizes 50 200 500] [--workers 2]
+"""
+import argparse
+
+from common import best_time, example_mdp_args
+from components import solve_components
+from mdp import MDP
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--densities', type=float, nargs='+',
+                        default=[0, .3, .45])
+    parser.add_argument('--discount', type=float, default=.95)
+    parser.add_argument('--workers', type=int,
+                        help='solve components in a pool of this many processes')
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'density':>8} {'components':>11} {'solved':>8} "
+          f"{'pruned':>8} {'full VI ms':>11} {'components ms':>14}")
+    for size in args.sizes:
+        for density in args.densities:
+            mdp_args = (*example_mdp_args(size, density), args.discount, size)
+            mdp = MDP(*mdp_args)
+            values = mdp.values
+            def run_full():
+                mdp.values = values
+                mdp.value_iteration()
+            def run_components():
+                mdp.values = values
+                return solve_components(mdp, max_workers=args.workers)
+            result = run_components()
+            full = best_time(run_full, 3)
+            components = best_time(run_components, 3)
+            print(f"{size:>6} {density:>8} {result['components']:>11} "
+                  f"{result['states']:>8} {result['pruned']:>8} "
+                  f"{full*1e3:>11.1f} {components*1e3:>14.1f}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Per-request MDP construction time with and without the LayoutCache used by
+the step endpoints of the app, for a client repeatedly stepping one grid.
+
+    python benchmarks/construction_cache.py [--sizes 10 50 200]
+"""
+import argparse
+
+import numpy as np
+
+from common import best_time, example_mdp_args
+from layout_cache import LayoutCache
+from mdp import MDP
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200])
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'uncached ms':>12} {'cached ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        state_rewards_dict, blocked_states_list = example_mdp_args(size)
+        values = np.random.rand(size**2)
+        policy = np.random.randint(0, 4, size=size**2)
+        mdp_args = (state_rewards_dict, blocked_states_list, .9, size,
+                    values, policy)
+        cache = LayoutCache()
+        uncached = best_time(lambda: MDP(*mdp_args), number=10)
+        cached = best_time(lambda: cache.get_mdp(*mdp_args), number=10)
+        print(f"{size:>6} {uncached*1e3:>12.3f} {cached*1e3:>10.3f} "
+              f"{uncached/cached:>7.1f}x")
+        print(f"{'':>6} {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
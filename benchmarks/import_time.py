@@ -0,0 +1,62 @@
+"""
+Cold-start import time of the core solver modules, measured with
+python -X importtime in a fresh interpreter, and the optional heavy
+dependencies each one pulls in. That none is pulled in is checked by
+tests/test_imports.py.
+
+    python benchmarks/import_time.py [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from common import path
+
+
+MODULES = ['mdp', 'layout_cache', 'parallel']
+HEAVY = ['seaborn', 'matplotlib', 'pandas', 'scipy']
+
+CHILD = """
+import sys
+import {module}
+print(' '.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+"""
+Import module in a fresh interpreter and return the cumulative import time
+in ms reported by -X importtime, and the heavy modules that were loaded
+"""
+def measure(module):
+    
+    out = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             CHILD.format(module=module, heavy=HEAVY)],
+            cwd=os.path.join(path, '..', 'src'),
+            capture_output=True, text=True, check=True
+        )
+    cumulative = 0
+    for line in out.stderr.splitlines():
+        fields = [f.strip() for f in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            cumulative = int(fields[1])
+    return cumulative / 1e3, out.stdout.split()
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    print(f"{'module':>14} {'best ms':>8} {'heavy imports':>14}")
+    for module in MODULES:
+        runs = [measure(module) for _ in range(args.repeat)]
+        best = min(ms for ms, _ in runs)
+        heavy = runs[0][1]
+        print(f"{module:>14} {best:>8.1f} {' '.join(heavy) or '-':>14}")
+
+
+if __name__ == '__main__':
+    main()
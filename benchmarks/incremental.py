@@ -0,0 +1,58 @@
+"""
+Re-solving after single-cell edits: incremental updates with a frontier
+solve from the previous values, against rebuilding and solving from scratch.
+
+    python benchmarks/incremental.py [--size 200] [--edits 20]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=200)
+    parser.add_argument('--edits', type=int, default=20)
+    parser.add_argument('--discount', type=float, default=.9)
+    parser.add_argument('--eps', type=float, default=1e-6)
+    args = parser.parse_args()
+    
+    size = args.size
+    rng = np.random.default_rng(0)
+    mdp = MDP(*example_mdp_args(size), args.discount, size)
+    mdp.value_iteration(max_iters=10000, eps=args.eps)
+    
+    print(f"{'edit':>24} {'incremental ms':>15} {'backups':>9} "
+          f"{'scratch ms':>11} {'max err':>9}")
+    for _ in range(args.edits):
+        cell = tuple(int(c) for c in rng.integers(size, size=2))
+        if rng.random() < .5:
+            blocked = cell not in set(map(tuple, mdp.blocked_states_list))
+            mdp.set_blocked(cell, blocked)
+            edit = f"blocked {cell}={blocked}"
+        else:
+            reward = float(rng.choice([0, .5, 1]))
+            mdp.set_reward(cell, reward)
+            edit = f"reward {cell}={reward}"
+        start = time.perf_counter()
+        stats = mdp.value_iteration(max_iters=10000, eps=args.eps,
+                                    method='frontier')
+        incremental = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        scratch = MDP(mdp.state_rewards_dict, mdp.blocked_states_list,
+                      args.discount, size)
+        scratch.value_iteration(max_iters=10000, eps=args.eps)
+        scratch_seconds = time.perf_counter() - start
+        err = np.abs(scratch.values - mdp.values).max()
+        print(f"{edit:>24} {incremental*1e3:>15.2f} {stats['backups']:>9} "
+              f"{scratch_seconds*1e3:>11.2f} {err:>9.2e}")
+
+
+if __name__ == '__main__':
+    main()
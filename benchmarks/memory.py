@@ -0,0 +1,88 @@
+"""
+Peak memory of MDP construction plus Bellman sweeps across grid sizes.
+
+Each measurement runs in a fresh interpreter so peak RSS is not polluted by
+earlier runs. The "dense" column is the former (#states, #actions, #states)
+formulation, reproduced inline for comparison; it is skipped for grids where
+it would not fit in memory.
+
+    python benchmarks/memory.py [--sizes 10 25 50 100 200] [--sweeps 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+path = os.path.dirname(os.path.realpath(__file__))
+
+MAX_DENSE_STATES = 2500
+
+CHILD = """
+import resource, sys
+import numpy as np
+sys.path.append({src!r})
+from mdp import MDP
+
+size, sweeps, mode = {size}, {sweeps}, {mode!r}
+mdp = MDP({{(size//2, size//2): 1}}, [(0, size-1)], .9, size)
+
+if mode == 'dense':
+    n_states, n_actions = mdp.states.shape[0], mdp.actions.shape[0]
+    transitions = np.zeros((n_states, n_actions, n_states+1))
+    transitions[np.arange(n_states)[:,None], np.arange(n_actions),
+                mdp.transitions] = 1
+    transitions = transitions[:,:,:-1]
+    rewards = np.broadcast_to(mdp.state_rewards, transitions.shape).copy()
+    for _ in range(sweeps):
+        expanded = np.broadcast_to(mdp.values, transitions.shape).copy()
+        mdp.values = (transitions*(rewards + mdp.discount*expanded)
+                      ).sum(axis=2).max(axis=1)
+else:
+    for _ in range(sweeps):
+        mdp.values = mdp.evaluate_values()
+
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def peak_rss_mb(size, sweeps, mode):
+    
+    code = CHILD.format(src=os.path.join(path, '..', 'src'), size=size,
+                        sweeps=sweeps, mode=mode)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                         text=True, check=True)
+    return int(out.stdout.split()[-1]) / 1024
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10, 25, 50, 100, 200])
+    parser.add_argument('--sweeps', type=int, default=10)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    
+    results = []
+    for size in args.sizes:
+        row = {'size': size, 'states': size**2,
+               'sparse_mb': peak_rss_mb(size, args.sweeps, 'sparse')}
+        if size**2 <= MAX_DENSE_STATES:
+            row['dense_mb'] = peak_rss_mb(size, args.sweeps, 'dense')
+        else:
+            row['dense_mb'] = None
+        results.append(row)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'size':>6} {'states':>8} {'dense MB':>10} {'sparse MB':>10}")
+    for row in results:
+        dense = 'skipped' if row['dense_mb'] is None else f"{row['dense_mb']:.1f}"
+        print(f"{row['size']:>6} {row['states']:>8} {dense:>10} "
+              f"{row['sparse_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
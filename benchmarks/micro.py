@@ -0,0 +1,53 @@
+"""
+Micro-benchmarks of the per-state helpers of MDP across grid sizes.
+
+    python benchmarks/micro.py [--sizes 10 100 500]
+"""
+import argparse
+
+import numpy as np
+
+from common import best_time, example_mdp_args
+from mdp import MDP
+
+
+def cases(mdp):
+    
+    return {
+        'get_blocked_states_': lambda: mdp.get_blocked_states_(
+                mdp.states, mdp.blocked_states_list),
+        'get_rewards_': lambda: mdp.get_rewards_(
+                mdp.states, mdp.actions, mdp.state_rewards_dict),
+        'get_transitions_': lambda: mdp.get_transitions_(
+                mdp.states, mdp.actions, mdp.blocked_states),
+        'evaluate_values': mdp.evaluate_values,
+        'evaluate_policy_values': mdp.evaluate_policy_values,
+        'optimize_policy': mdp.optimize_policy,
+        'get_grid_total_rewards': mdp.get_grid_total_rewards,
+        'get_grid_policy': mdp.get_grid_policy,
+    }
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10, 100, 500])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    timings = {}
+    for size in args.sizes:
+        np.random.seed(0)
+        mdp = MDP(*example_mdp_args(size), .9, size)
+        mdp.values = np.random.rand(size**2)
+        for name, fn in cases(mdp).items():
+            timings.setdefault(name, {})[size] = best_time(fn, args.repeat)
+    
+    print(f"{'function':<24}" + ''.join(f"{s:>12}" for s in args.sizes))
+    for name, row in timings.items():
+        print(f"{name:<24}" + ''.join(f"{row[s]*1e3:>10.3f}ms" for s in args.sizes))
+
+
+if __name__ == '__main__':
+    main()
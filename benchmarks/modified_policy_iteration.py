@@ -0,0 +1,69 @@
+"""
+Iterations, backups and wall-clock of value iteration with each stopping
+rule against modified policy iteration with and without action elimination.
+
+The "loss" column is the largest amount by which the value of the returned
+greedy policy falls short of the optimal values (from an exact policy
+iteration); the "error" column is the largest error of the returned values.
+
+    python benchmarks/modified_policy_iteration.py [--size 50] [--discounts .9 .99 .999]
+"""
+import argparse
+
+import numpy as np
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+def get_solvers(eps):
+    
+    return {
+        'value_iteration l2': lambda mdp: mdp.value_iteration(10**6, eps),
+        'value_iteration sup': lambda mdp: mdp.value_iteration(
+                10**6, eps, stop='sup'),
+        'value_iteration span': lambda mdp: mdp.value_iteration(
+                10**6, eps, stop='span'),
+        'modified 0 eliminate': lambda mdp: mdp.modified_policy_iteration(
+                0, 10**6, eps, eliminate=True),
+        'modified 5': lambda mdp: mdp.modified_policy_iteration(
+                5, 10**6, eps),
+        'modified 20': lambda mdp: mdp.modified_policy_iteration(
+                20, 10**6, eps),
+        'modified 20 eliminate': lambda mdp: mdp.modified_policy_iteration(
+                20, 10**6, eps, eliminate=True),
+    }
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=50)
+    parser.add_argument('--discounts', type=float, nargs='+',
+                        default=[.9, .99, .999])
+    parser.add_argument('--eps', type=float, default=1e-3)
+    args = parser.parse_args()
+    
+    mdp_args = example_mdp_args(args.size)
+    print(f"{'discount':>8} {'solver':>22} {'iters':>6} {'backups':>10} "
+          f"{'Q values':>10} {'seconds':>8} {'error':>9} {'loss':>9}")
+    for discount in args.discounts:
+        optimal = MDP(*mdp_args, discount, args.size)
+        optimal.policy_iteration(method='direct')
+        for name, solve in get_solvers(args.eps).items():
+            np.random.seed(0)
+            mdp = MDP(*mdp_args, discount, args.size)
+            stats = solve(mdp)
+            greedy = MDP(*mdp_args, discount, args.size, policy=mdp.policy)
+            greedy.policy_evaluation(method='direct')
+            error = np.abs(mdp.values - optimal.values).max()
+            loss = (optimal.values - greedy.values).max()
+            action_backups = stats.get('action_backups',
+                                       stats['backups']*mdp.actions.shape[0])
+            print(f"{discount:>8} {name:>22} {stats['iterations']:>6} "
+                  f"{stats['backups']:>10} {action_backups:>10} "
+                  f"{stats['seconds']:>8.3f} {error:>9.2e} {loss:>9.2e}")
+
+
+if __name__ == '__main__':
+    main()
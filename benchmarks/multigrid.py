@@ -0,0 +1,44 @@
+"""
+Multigrid warm started value iteration against plain value iteration.
+
+Reports the sweeps and seconds of every level of the multigrid solve next
+to value iteration from zeros. That the multigrid values match the exact
+ones is checked by tests/test_multigrid.py.
+
+    python benchmarks/multigrid.py [--sizes 50 200 500] [--discount .99]
+"""
+import argparse
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--densities', type=float, nargs='+',
+                        default=[0, .1, .3])
+    parser.add_argument('--discount', type=float, default=.99)
+    parser.add_argument('--max-iters', type=int, default=5000)
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'density':>8} {'method':>10} {'sweeps':>7} "
+          f"{'ms':>9}  levels (size: sweeps, ms)")
+    for size in args.sizes:
+        for density in args.densities:
+            mdp_args = (*example_mdp_args(size, density), args.discount, size)
+            for method in ('jacobi', 'multigrid'):
+                mdp = MDP(*mdp_args)
+                result = mdp.value_iteration(args.max_iters, method=method)
+                levels = ', '.join(
+                        f"{level['size']}: {level['iterations']}, "
+                        f"{level['seconds']*1e3:.1f}"
+                        for level in result.get('levels', []))
+                print(f"{size:>6} {density:>8} {method:>10} "
+                      f"{result['iterations']:>7} "
+                      f"{result['seconds']*1e3:>9.1f}  {levels}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Requests per second of the demo pages, rendered on every request against
+served from the page cache, with and without ETag revalidation.
+
+Requests go through the Flask test client from --clients threads, so the
+numbers measure the application rather than a web server.
+
+    python benchmarks/page_load.py [--seconds 2] [--clients 4]
+"""
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+from common import path
+
+sys.path.append(os.path.join(path, '..', 'app'))
+import app
+
+app.app.secret_key = 'benchmark'
+
+
+PAGES = ['/', '/value_iteration', '/policy_iteration']
+
+
+def requests_per_second(page, seconds, clients, headers=None):
+    
+    def client():
+        test_client = app.app.test_client()
+        n = 0
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            test_client.get(page, headers=headers)
+            n += 1
+        return n
+    
+    with concurrent.futures.ThreadPoolExecutor(clients) as executor:
+        counts = list(executor.map(lambda _: client(), range(clients)))
+    return sum(counts) / seconds
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--seconds', type=float, default=2)
+    parser.add_argument('--clients', type=int, default=4)
+    args = parser.parse_args()
+    
+    print(f"{'page':>18} {'uncached':>10} {'cached':>10} {'304':>10}")
+    for page in PAGES:
+        app.cache_pages = False
+        uncached = requests_per_second(page, args.seconds, args.clients)
+        app.cache_pages = True
+        cached = requests_per_second(page, args.seconds, args.clients)
+        etag = app.app.test_client().get(page).headers['ETag']
+        revalidated = requests_per_second(page, args.seconds, args.clients,
+                                          {'If-None-Match': etag})
+        print(f"{page:>18} {uncached:>10.0f} {cached:>10.0f} "
+              f"{revalidated:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Throughput (MDPs solved per second) of solve_parallel as the number of
+worker processes grows.
+
+    python benchmarks/parallel_throughput.py [--size 30] [--configs 200] [--workers 1 2 4]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from common import example_mdp_args
+from parallel import solve_parallel
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=30)
+    parser.add_argument('--configs', type=int, default=200)
+    parser.add_argument('--layouts', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count()}))
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    layouts = [example_mdp_args(args.size, seed=i)[1]
+               for i in range(args.layouts)]
+    configs = [{'state_rewards_dict': {(int(x), int(y)): 1.0},
+                'blocked_states_list': layouts[i % args.layouts],
+                'discount': float(rng.uniform(.5, .99)),
+                'size': args.size}
+               for i, (x, y) in enumerate(rng.integers(args.size,
+                                                       size=(args.configs, 2)))]
+    
+    print(f"{'workers':>8} {'seconds':>9} {'MDPs/s':>9}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        n = sum(1 for _ in solve_parallel(configs, workers))
+        seconds = time.perf_counter() - start
+        print(f"{workers:>8} {seconds:>9.3f} {n/seconds:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Wall-clock of policy iteration with iterative versus exact policy evaluation.
+
+For each grid size and discount, policy iteration is run from the same random
+policy with every policy_evaluation method. Reported are the number of outer
+iterations, total time and the largest deviation of the final values from the
+direct solve.
+
+    python benchmarks/policy_evaluation.py [--sizes 10 50 100] [--discounts .9 .99]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import common
+from mdp import MDP
+
+
+METHODS = ['iterative', 'direct']
+
+
+def run(size, discount, method, max_iters=100):
+    
+    np.random.seed(0)
+    mdp = MDP({(size//2, size//2): 1, (0, 0): 1}, [(1, 1)], discount, size)
+    start = time.perf_counter()
+    stable = False
+    i = 0
+    while i < max_iters and not stable:
+        mdp.policy_evaluation(method=method)
+        stable = mdp.policy_improvement(0 if method == 'iterative' else 1e-9)
+        i += 1
+    return i, time.perf_counter() - start, mdp.values
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--discounts', type=float, nargs='+',
+                        default=[.9, .99])
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'discount':>8} {'method':>10} {'outer':>6} "
+          f"{'seconds':>9} {'max err':>9}")
+    for size in args.sizes:
+        for discount in args.discounts:
+            results = {m: run(size, discount, m) for m in METHODS}
+            reference = results['direct'][2]
+            for method, (iters, seconds, values) in results.items():
+                err = np.abs(values - reference).max()
+                print(f"{size:>6} {discount:>8} {method:>10} {iters:>6} "
+                      f"{seconds:>9.3f} {err:>9.2e}")
+
+
+if __name__ == '__main__':
+    main()
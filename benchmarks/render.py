@@ -0,0 +1,43 @@
+"""
+Render time of make_grid_world for value and policy tables across grid
+sizes.
+
+    python benchmarks/render.py [--sizes 10 50 100 300]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from common import best_time, example_mdp_args, path
+from mdp import MDP
+
+sys.path.append(os.path.join(path, '..', 'app'))
+from grid_world import make_grid_world
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10, 50, 100, 300])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'values ms':>10} {'policy ms':>10} {'us/cell':>8}")
+    for size in args.sizes:
+        mdp = MDP(*example_mdp_args(size), .9, size)
+        total_rewards = np.random.default_rng(0).random(size**2)
+        values = best_time(lambda: make_grid_world(
+                mdp.states, total_rewards, mdp.policy,
+                mdp.blocked_states_list), args.repeat)
+        policy = best_time(lambda: make_grid_world(
+                mdp.states, total_rewards, mdp.policy,
+                mdp.blocked_states_list, show_policy=True), args.repeat)
+        print(f"{size:>6} {values*1e3:>10.2f} {policy*1e3:>10.2f} "
+              f"{values/size**2*1e6:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Throughput of vectorized Monte Carlo rollouts against a Python loop.
+
+Reports simulated steps per second over grid sizes and episode counts.
+That rollouts return the values of the policy is checked by
+tests/test_rollouts.py.
+
+    python benchmarks/rollout_throughput.py [--sizes 20 50 200] [--episodes 100 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import example_mdp_args
+from mdp import MDP
+from rollouts import simulate
+
+
+"""
+Simulate one episode at a time with plain Python, the way rollouts were
+written before, and return the steps simulated per second
+"""
+def python_loop(mdp, starts, episodes, horizon, noise, seed=0):
+    
+    rng = np.random.default_rng(seed)
+    n_states, n_actions = mdp.transitions.shape
+    starts = mdp.get_state_indices_(mdp.states, starts).tolist()
+    transitions = mdp.transitions.tolist()
+    rewards = mdp.rewards.tolist()
+    policy = mdp.policy.tolist()
+    steps = 0
+    start = time.perf_counter()
+    for state in starts:
+        for _ in range(episodes):
+            s, scale, total = state, 1., 0.
+            for _ in range(horizon):
+                action = policy[s]
+                if rng.random() < noise:
+                    action = int(rng.integers(n_actions))
+                s = transitions[s][action]
+                steps += 1
+                if s == n_states:
+                    break
+                total += scale*rewards[s]
+                scale *= mdp.discount
+    return steps/(time.perf_counter() - start)
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 50, 200])
+    parser.add_argument('--starts', type=int, default=100,
+                        help='number of random start cells')
+    parser.add_argument('--episodes', type=int, nargs='+',
+                        default=[10, 100, 1000, 10000])
+    parser.add_argument('--discount', type=float, default=.95)
+    parser.add_argument('--horizon', type=int, default=100)
+    parser.add_argument('--noise', type=float, default=.1)
+    parser.add_argument('--loop-episodes', type=int, default=2,
+                        help='episodes per start of the Python loop baseline')
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'episodes':>9} {'steps':>12} {'ms':>9} "
+          f"{'M steps/s':>10} {'loop M steps/s':>15}")
+    for size in args.sizes:
+        mdp = MDP(*example_mdp_args(size), args.discount, size)
+        mdp.value_iteration()
+        starts = np.random.default_rng(0).integers(0, size, (args.starts, 2))
+        loop = python_loop(mdp, starts, args.loop_episodes, args.horizon,
+                           args.noise)
+        for episodes in args.episodes:
+            result = simulate(mdp, starts, episodes, args.horizon, args.noise,
+                              seed=0)
+            print(f"{size:>6} {episodes:>9} {result['steps']:>12} "
+                  f"{result['seconds']*1e3:>9.1f} "
+                  f"{result['steps_per_second']/1e6:>10.2f} "
+                  f"{loop/1e6:>15.2f}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
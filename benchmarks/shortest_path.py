@@ -0,0 +1,41 @@
+"""
+Exact shortest-path solver against value iteration.
+
+That value_iteration(method='shortest-path') gives the converged values and
+falls back to value iteration when its preconditions fail is checked by
+tests/test_shortest_path.py.
+
+    python benchmarks/shortest_path.py [--sizes 50 200 500] [--discount .95]
+"""
+import argparse
+
+from common import best_time, example_mdp_args
+from mdp import MDP
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--discount', type=float, default=.95)
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'value iteration ms':>19} {'iterations':>11} "
+          f"{'shortest path ms':>17}")
+    for size in args.sizes:
+        mdp = MDP(*example_mdp_args(size), args.discount, size)
+        values = mdp.values
+        times = []
+        for method in ('jacobi', 'shortest-path'):
+            def run():
+                mdp.values = values
+                return mdp.value_iteration(method=method)
+            times.append(best_time(run, 3))
+            if method == 'jacobi':
+                iterations = run()['iterations']
+        print(f"{size:>6} {times[0]*1e3:>19.1f} {iterations:>11} "
+              f"{times[1]*1e3:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Solving with value_iteration against loading the result from a ResultCache,
+with a cold cache, a warm cache and a warm cache in a new process.
+
+    python benchmarks/solved_cache.py [--sizes 10 100 300] [--algorithm value_iteration]
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import example_mdp_args, path
+from mdp import MDP
+from result_cache import ResultCache
+
+
+CHILD = """
+import sys, time
+sys.path.append({src!r})
+sys.path.append({benchmarks!r})
+from common import example_mdp_args
+from mdp import MDP
+from result_cache import ResultCache
+
+size = {size}
+mdp = MDP(*example_mdp_args(size), .95, size)
+start = time.perf_counter()
+ResultCache({directory!r}).solve(mdp, {algorithm!r})
+print(time.perf_counter() - start)
+"""
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--algorithm', default='value_iteration')
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'solve ms':>10} {'cold ms':>10} {'warm ms':>10} "
+          f"{'restart ms':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory)
+        for size in args.sizes:
+            times = []
+            for _ in range(3):
+                mdp = MDP(*example_mdp_args(size), .95, size)
+                start = time.perf_counter()
+                if times:
+                    cache.solve(mdp, args.algorithm)
+                else:
+                    getattr(mdp, args.algorithm)()
+                times.append(time.perf_counter() - start)
+            out = subprocess.run(
+                    [sys.executable, '-c', CHILD.format(
+                            src=path + '/../src', benchmarks=path, size=size,
+                            directory=directory, algorithm=args.algorithm)],
+                    capture_output=True, text=True, check=True).stdout
+            times.append(float(out))
+            print(f"{size:>6} " + ' '.join(
+                    f"{t*1e3:>10.2f}" for t in times[:3]) + f" {times[3]*1e3:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Bellman sweeps and solves with the stencil backend against the transition
+table backend.
+
+That both backends give identical values and policies is checked by
+tests/test_stencil.py.
+
+    python benchmarks/stencil.py [--sizes 50 200 500] [--discount .95]
+"""
+import argparse
+
+from common import best_time, example_mdp_args
+from mdp import MDP
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--discount', type=float, default=.95)
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'table sweep ms':>15} {'stencil sweep ms':>17} "
+          f"{'table VI ms':>12} {'stencil VI ms':>14}")
+    for size in args.sizes:
+        mdp_args = (*example_mdp_args(size), args.discount, size)
+        times = []
+        for fn in (lambda mdp: mdp.evaluate_values(),
+                   lambda mdp: mdp.value_iteration()):
+            for backend in ('table', 'stencil'):
+                mdp = MDP(*mdp_args, backend=backend)
+                values = mdp.values
+                def run():
+                    mdp.values = values
+                    fn(mdp)
+                times.append(best_time(run, 3))
+        print(f"{size:>6} {times[0]*1e3:>15.2f} {times[1]*1e3:>17.2f} "
+              f"{times[2]*1e3:>12.1f} {times[3]*1e3:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark suite of MDP construction, solvers, rendering and step endpoints.
+
+Every case is run over a matrix of grid sizes, discounts and obstacle
+densities and records its median wall-clock time and the peak memory
+allocated during one call after a warm-up call (traced with tracemalloc).
+Results are compared against a stored baseline and the run exits with
+status 1 if any case is slower or allocates more than the tolerances allow.
+Timings depend on the machine and vary between runs, so the baseline is
+recorded over more repeats, with --save on the machine the suite is gated
+on, and the default tolerance allows a run to take twice the baseline.
+
+    python benchmarks/suite.py [--sizes 5 50 200 500] [--filter value_iteration]
+    python benchmarks/suite.py --save          # store a new baseline
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from common import best_time, example_mdp_args, path
+from mdp import MDP
+
+sys.path.append(os.path.join(path, '..', 'app'))
+from grid_world import make_grid_world
+
+
+BASELINE = os.path.join(path, 'baseline.json')
+
+SIZES = [5, 50, 200, 500]
+DISCOUNTS = [.5, .9, .99]
+DENSITIES = [0, .1, .3]
+
+
+def setup_init(size, discount, density):
+    
+    args = example_mdp_args(size, density)
+    return lambda: MDP(*args, discount, size)
+
+
+def setup_solver(method, **kwargs):
+    
+    def setup(size, discount, density):
+        # the initial policy is random, and policy evaluation's run time
+        # depends on it
+        np.random.seed(0)
+        mdp = MDP(*example_mdp_args(size, density), discount, size)
+        values, policy = mdp.values.copy(), mdp.policy.copy()
+        def run():
+            mdp.values, mdp.policy = values.copy(), policy.copy()
+            getattr(mdp, method)(**kwargs)
+        return run
+    return setup
+
+
+def setup_render(size, discount, density):
+    
+    mdp = MDP(*example_mdp_args(size, density), discount, size)
+    mdp.value_iteration()
+    return lambda: make_grid_world(mdp.states, mdp.get_total_rewards(),
+                                   mdp.policy, mdp.blocked_states_list)
+
+
+def setup_endpoint(endpoint):
+    
+    def setup(size, discount, density):
+        import app
+        app.app.secret_key = 'benchmark'
+        client = app.app.test_client()
+        state_rewards_dict, blocked_states_list = example_mdp_args(
+                size, density)
+        data = json.dumps({
+                'size': size,
+                'state_rewards_list': [[list(k), v] for k, v
+                                       in state_rewards_dict.items()],
+                'blocked_states_list': [list(s) for s in blocked_states_list],
+                'discount': discount,
+                'values': [0]*size**2,
+                'policy': [0]*size**2,
+                'started': True})
+        return lambda: client.post(endpoint, data=data)
+    return setup
+
+
+# name: (setup, parameters the case depends on)
+BENCHMARKS = {
+    'init': (setup_init, ('size', 'density')),
+    'value_iteration': (setup_solver('value_iteration'),
+                        ('size', 'discount', 'density')),
+    'policy_evaluation': (setup_solver('policy_evaluation'),
+                          ('size', 'discount', 'density')),
+    'policy_iteration': (setup_solver('policy_iteration', max_iters=10),
+                         ('size', 'discount', 'density')),
+    'make_grid_world': (setup_render, ('size',)),
+    'value_iteration_step': (setup_endpoint('/value_iteration_step'),
+                             ('size',)),
+    'policy_evaluation_step': (setup_endpoint('/policy_evaluation_step'),
+                               ('size',)),
+}
+
+
+"""
+Return the (case id, benchmark name, size, discount, density) of every case
+selected by the arguments. Parameters a benchmark does not depend on are
+fixed to the first value given
+"""
+def get_cases(args):
+    
+    cases = []
+    for name, (_, depends) in BENCHMARKS.items():
+        if args.filter and not any(f in name for f in args.filter):
+            continue
+        discounts = args.discounts if 'discount' in depends else [.9]
+        densities = args.densities if 'density' in depends else [.1]
+        for size, discount, density in itertools.product(
+                args.sizes, discounts, densities):
+            params = {'size': size, 'discount': discount, 'density': density}
+            case_id = name + '[' + ','.join(
+                    f"{key}={params[key]}" for key in depends) + ']'
+            cases.append((case_id, name, size, discount, density))
+    return cases
+
+
+"""
+Return the median time in seconds and peak traced bytes of one call of fn.
+fn is called once first so that one-time allocations and caches filled by
+the first call count towards neither. Fast cases are called several times
+per timing run so each run lasts about 50 ms, and slow cases are timed
+once so the largest grids stay tractable
+"""
+def measure(fn, repeat):
+    
+    fn()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    first = best_time(fn, repeat=1)
+    if first > 1:
+        return first, peak
+    number = max(1, int(.05/first))
+    times = timeit.repeat(fn, repeat=repeat, number=number)
+    return statistics.median(times)/number, peak
+
+
+def machine():
+    
+    return {'machine': platform.machine(), 'processor': platform.processor(),
+            'python': platform.python_version(), 'numpy': np.__version__}
+
+
+"""
+Return a description of each case slower or larger than its baseline by
+more than the tolerances; differences below the absolute floors are noise
+"""
+def get_regressions(results, baseline, args):
+    
+    regressions = []
+    for case_id, result in results.items():
+        if case_id not in baseline:
+            continue
+        base = baseline[case_id]
+        if (result['seconds'] > base['seconds']*(1 + args.time_tolerance)
+                and result['seconds'] - base['seconds'] > args.min_seconds):
+            regressions.append(f"{case_id}: {result['seconds']*1e3:.2f} ms "
+                               f"vs {base['seconds']*1e3:.2f} ms")
+        if (result['peak_bytes'] > base['peak_bytes']*(1 + args.memory_tolerance)
+                and result['peak_bytes'] - base['peak_bytes'] > args.min_bytes):
+            regressions.append(f"{case_id}: {result['peak_bytes']/2**20:.2f} MB "
+                               f"vs {base['peak_bytes']/2**20:.2f} MB")
+    return regressions
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--discounts', type=float, nargs='+', default=DISCOUNTS)
+    parser.add_argument('--densities', type=float, nargs='+', default=DENSITIES)
+    parser.add_argument('--filter', nargs='+',
+                        help='only run benchmarks whose name contains one of these')
+    parser.add_argument('--repeat', type=int,
+                        help='timing runs per case; defaults to 5, or 15 with --save')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true',
+                        help='merge the results into the baseline instead of comparing')
+    parser.add_argument('--time-tolerance', type=float, default=1,
+                        help='allowed relative slowdown')
+    parser.add_argument('--memory-tolerance', type=float, default=.2,
+                        help='allowed relative growth of peak memory')
+    parser.add_argument('--min-seconds', type=float, default=5e-3)
+    parser.add_argument('--min-bytes', type=int, default=2**16)
+    args = parser.parse_args()
+    if args.repeat is None:
+        args.repeat = 15 if args.save else 5
+    
+    stored = {'machine': machine(), 'results': {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    baseline = stored['results']
+    if not args.save and stored['machine'] != machine():
+        print(f"warning: baseline was recorded on {stored['machine']}",
+              file=sys.stderr)
+    
+    results = {}
+    print(f"{'case':<58} {'ms':>10} {'base ms':>10} {'peak MB':>8}")
+    for case_id, name, size, discount, density in get_cases(args):
+        fn = BENCHMARKS[name][0](size, discount, density)
+        seconds, peak = measure(fn, args.repeat)
+        results[case_id] = {'seconds': seconds, 'peak_bytes': peak}
+        base = baseline.get(case_id, {}).get('seconds')
+        base = f"{base*1e3:>10.2f}" if base is not None else f"{'-':>10}"
+        print(f"{case_id:<58} {seconds*1e3:>10.2f} {base} "
+              f"{peak/2**20:>8.2f}", flush=True)
+    
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': machine(), 'results': baseline}, f,
+                      indent=1, sort_keys=True)
+        print(f"saved {len(results)} results to {args.baseline}")
+        return
+    
+    regressions = get_regressions(results, baseline, args)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Iterations, backups and wall-clock of each value_iteration method.
+
+Note that eps bounds the L2 change per sweep for 'jacobi' and 'gauss-seidel'
+but the Bellman error of a single state for 'prioritized'. The last column
+is the largest deviation from the jacobi values.
+
+    python benchmarks/value_iteration.py [--sizes 10 50 100] [--discount .95]
+"""
+import argparse
+
+import numpy as np
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+METHODS = ['jacobi', 'gauss-seidel', 'prioritized']
+
+
+def main():
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--discount', type=float, default=.95)
+    parser.add_argument('--eps', type=float, default=1e-6)
+    parser.add_argument('--density', type=float, default=.1)
+    args = parser.parse_args()
+    
+    print(f"{'size':>6} {'method':>13} {'iters':>6} {'backups':>10} "
+          f"{'seconds':>9} {'max err':>9}")
+    for size in args.sizes:
+        state_rewards_dict, blocked_states_list = example_mdp_args(
+                size, args.density)
+        reference = None
+        for method in METHODS:
+            mdp = MDP(state_rewards_dict, blocked_states_list, args.discount,
+                      size)
+            stats = mdp.value_iteration(max_iters=10000, eps=args.eps,
+                                        method=method)
+            if reference is None:
+                reference = mdp.values
+            err = np.abs(mdp.values - reference).max()
+            print(f"{size:>6} {method:>13} {stats['iterations']:>6} "
+                  f"{stats['backups']:>10} {stats['seconds']:>9.3f} "
+                  f"{err:>9.2e}")
+
+
+if __name__ == '__main__':
+    main()
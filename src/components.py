@@ -0,0 +1,168 @@
+import concurrent.futures
+import time
+
+import numpy as np
+
+from mdp import MDP
+
+
+# value iteration methods that need the full grid rather than a subset of it
+GRID_METHODS = ('multigrid', 'frontier')
+
+
+"""
+Return the states whose value can differ from 0: those that can reach a
+state or action with a nonzero reward. Every other state collects nothing
+whatever it does, so its value is exactly 0
+Parameters:
+    MDP mdp: MDP to search
+Returns:
+    boolean array of shape (#states)
+"""
+def get_reachable(mdp):
+
+    if mdp.transition_rewards is None:
+        # rewards are collected by moving into an open rewarding state
+        targets = np.flatnonzero(mdp.rewards*mdp.blocked_states)
+        return mdp.get_distances_(targets) >= 0
+    rewarding = (mdp.transition_rewards != 0).any(axis=1)
+    return rewarding | (mdp.get_distances_(np.flatnonzero(rewarding)) >= 0)
+
+
+"""
+Split the open states that can reach a reward into connected components.
+Blocked states are left out since no move leads into them, so nothing
+else depends on their values
+Parameters:
+    MDP mdp: MDP to split
+Returns:
+    tuple (components, pruned), a list of sorted arrays of state indices,
+    largest first, and an array of the states outside every component
+"""
+def get_components(mdp):
+
+    import scipy.sparse
+    import scipy.sparse.csgraph
+
+    n_states = mdp.states.shape[0]
+    is_kept = get_reachable(mdp) & (mdp.blocked_states == 1)
+    kept = np.flatnonzero(is_kept)
+    remap = np.full(n_states + 1, kept.size)
+    remap[kept] = np.arange(kept.size)
+    transitions = remap[mdp.transitions[kept]]
+    rows, cols = np.nonzero(transitions < kept.size)
+    graph = scipy.sparse.csr_matrix(
+            (np.ones(rows.size, dtype=bool), (rows, transitions[rows, cols])),
+            shape=(kept.size, kept.size)
+        )
+    _, labels = scipy.sparse.csgraph.connected_components(
+            graph, directed=True, connection='weak')
+
+    order = np.argsort(labels, kind='stable')
+    splits = np.flatnonzero(np.diff(labels[order])) + 1
+    components = [kept[part] for part in np.split(order, splits)
+                  if part.size]
+    components.sort(key=len, reverse=True)
+    pruned = np.flatnonzero(~is_kept)
+    return components, pruned
+
+
+"""
+Return the arrays of an MDP restricted to one component. Moves leaving the
+component lead to states worth 0 that give no reward on entry, so they are
+given the sentinel index like moves off the grid
+Parameters:
+    MDP mdp: full MDP
+    array component: sorted array of state indices
+Returns:
+    dict of MDP keyword arguments
+"""
+def get_component_config(mdp, component):
+
+    remap = np.full(mdp.states.shape[0] + 1, component.size)
+    remap[component] = np.arange(component.size)
+    layout = {'states': mdp.states[component],
+              'actions': mdp.actions,
+              'blocked_states': np.ones(component.size, dtype=int),
+              'transitions': np.asfortranarray(
+                  remap[mdp.transitions[component]])}
+    if mdp.transition_rewards is None:
+        rewards = mdp.rewards[component]
+    else:
+        rewards = mdp.transition_rewards[component]
+    return {'layout': layout, 'rewards': rewards,
+            'values': mdp.values[component], 'policy': mdp.policy[component],
+            'discount': mdp.discount, 'dtype': mdp.dtype}
+
+
+"""
+Solve a single component, in this process or a worker process
+Parameters:
+    int index: position of the component
+    dict config: MDP keyword arguments as returned by get_component_config
+    str algorithm: name of the MDP solver method to call
+    dict solver_kwargs: keyword arguments for the solver method
+Returns:
+    tuple (index, values, policy)
+"""
+def solve_component(index, config, algorithm, solver_kwargs):
+
+    mdp = MDP(**config)
+    getattr(mdp, algorithm)(**solver_kwargs)
+    return index, mdp.values, mdp.policy
+
+
+"""
+Solve an MDP in place one connected component at a time. States that
+cannot reach a reward are worth 0 and are dropped from the solve, as are
+blocked states, whose values follow from a single backup of the solved
+values since no move leads into them. Each remaining component is solved
+as its own smaller MDP, in a process pool if max_workers is given, and
+the results are written back into the full values and policy
+Parameters:
+    MDP mdp: MDP to solve
+    str algorithm: name of the MDP solver method, e.g. 'value_iteration'
+                   or 'policy_iteration'
+    int max_workers: number of worker processes; components are solved in
+                     this process if None
+    solver_kwargs: keyword arguments for the solver method; the 'multigrid'
+                   and 'frontier' value iteration methods need the full
+                   grid and are not supported
+Returns:
+    dict with the number of components, the number of solved and of
+    pruned states and the wall-clock seconds taken
+"""
+def solve_components(mdp, algorithm='value_iteration', max_workers=None,
+                     **solver_kwargs):
+
+    if solver_kwargs.get('method') in GRID_METHODS:
+        raise ValueError(
+                f"method '{solver_kwargs['method']}' needs the full grid")
+    start = time.perf_counter()
+    components, pruned = get_components(mdp)
+    configs = [get_component_config(mdp, component)
+               for component in components]
+    if max_workers is None:
+        results = [solve_component(index, config, algorithm, solver_kwargs)
+                   for index, config in enumerate(configs)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            results = list(executor.map(
+                    solve_component, range(len(configs)), configs,
+                    [algorithm]*len(configs), [solver_kwargs]*len(configs)))
+
+    values = np.zeros(mdp.states.shape[0], dtype=mdp.dtype)
+    policy = np.zeros(mdp.states.shape[0], dtype=mdp.policy_dtype)
+    for index, component_values, component_policy in results:
+        values[components[index]] = component_values
+        policy[components[index]] = component_policy
+    # pruned open states cannot reach a reward and stay at 0
+    blocked = pruned[mdp.blocked_states[pruned] != 1]
+    values[blocked] = mdp.get_action_values_(values, states=blocked).max(
+            axis=1)
+    policy[pruned] = mdp.get_action_values_(values, states=pruned).argmax(
+            axis=1)
+    mdp.values, mdp.policy = values, policy
+    return {'components': len(components),
+            'states': sum(component.size for component in components),
+            'pruned': pruned.size, 'seconds': time.perf_counter() - start}
@@ -0,0 +1,186 @@
+import collections
+import threading
+import time
+
+
+class Phase:
+
+    """
+    Context manager adding the wall time of its block to a phase of a
+    SolverStats object
+    """
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+
+        self.stats = stats
+        self.name = name
+
+
+    def __enter__(self):
+
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc_info):
+
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class NullPhase:
+
+    """
+    Context manager that does nothing, used when instrumentation is disabled
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, *exc_info):
+
+        return False
+
+
+class NullStats:
+
+    """
+    Stand-in for SolverStats when instrumentation is disabled; every method
+    is a no-op so instrumented code costs only a method call
+    """
+    enabled = False
+    phase_ = NullPhase()
+
+    def phase(self, name):
+
+        return self.phase_
+
+
+    def add_time(self, name, seconds):
+
+        pass
+
+
+    def count(self, name, n=1):
+
+        pass
+
+
+    def gauge(self, name, value):
+
+        pass
+
+
+    def gauge_max(self, name, value):
+
+        pass
+
+
+class SolverStats:
+
+    """
+    Opt-in record of where a solver spends its time. Holds the wall time
+    and number of calls per phase (e.g. 'transitions', 'rewards', 'backup',
+    'argmax', 'render'), counters such as solver iterations, and gauges
+    such as the final Bellman residual or peak bytes of the transition and
+    reward arrays. Safe to share between threads, e.g. by all requests of
+    a server
+    """
+    enabled = True
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+
+        with self.lock:
+            self.seconds = collections.defaultdict(float)
+            self.calls = collections.defaultdict(int)
+            self.counters = collections.defaultdict(int)
+            self.gauges = {}
+
+
+    """
+    Return a context manager timing its block as the named phase
+    """
+    def phase(self, name):
+
+        return Phase(self, name)
+
+
+    def add_time(self, name, seconds):
+
+        with self.lock:
+            self.seconds[name] += seconds
+            self.calls[name] += 1
+
+
+    def count(self, name, n=1):
+
+        with self.lock:
+            self.counters[name] += n
+
+
+    def gauge(self, name, value):
+
+        with self.lock:
+            self.gauges[name] = value
+
+
+    """
+    Set a gauge to value if it is larger than the current one
+    """
+    def gauge_max(self, name, value):
+
+        with self.lock:
+            self.gauges[name] = max(self.gauges.get(name, value), value)
+
+
+    """
+    Return the recorded statistics as a dict of plain dicts
+    """
+    def as_dict(self):
+
+        with self.lock:
+            return {'phases': {name: {'seconds': self.seconds[name],
+                                      'calls': self.calls[name]}
+                               for name in self.seconds},
+                    'counters': dict(self.counters),
+                    'gauges': dict(self.gauges)}
+
+
+    """
+    Return the recorded statistics in the Prometheus text exposition format
+    Parameters:
+        str prefix: prefix of every metric name
+    Returns:
+        str
+    """
+    def to_prometheus(self, prefix='mdp'):
+
+        stats = self.as_dict()
+        lines = [f"# TYPE {prefix}_phase_seconds_total counter"]
+        lines += [f'{prefix}_phase_seconds_total{{phase="{name}"}} '
+                  f"{phase['seconds']}"
+                  for name, phase in stats['phases'].items()]
+        lines.append(f"# TYPE {prefix}_phase_calls_total counter")
+        lines += [f'{prefix}_phase_calls_total{{phase="{name}"}} '
+                  f"{phase['calls']}"
+                  for name, phase in stats['phases'].items()]
+        for name, value in stats['counters'].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in stats['gauges'].items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+NULL_STATS = NullStats()
@@ -0,0 +1,123 @@
+import collections
+import threading
+
+from mdp import MDP
+
+
+class LayoutCache:
+    
+    """
+    Bounded LRU cache of the arrays an MDP is built from, so that MDPs for
+    a layout that was seen recently are constructed without recomputing
+    them. Structural arrays are keyed on the grid size and set of blocked
+    states and per-state rewards on the grid size and reward dict. Cached
+    arrays are shared between MDPs and must not be modified in place. Safe
+    to share between threads, e.g. by all requests of a server
+    Parameters:
+        int maxsize: maximum number of layouts and of reward vectors kept
+        SolverStats stats: instrumentation given to the MDPs built by the
+                           cache, see MDP
+    """
+    def __init__(self, maxsize=32, stats=None):
+        
+        self.maxsize = maxsize
+        self.solver_stats = stats
+        self.layouts = collections.OrderedDict()
+        self.rewards = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        
+    
+    """
+    Return the entry for key from an LRU dict, computing and inserting it
+    with make if it is missing and evicting the least recently used entry
+    if the dict is full. make runs outside the lock, so two threads missing
+    the same key may both compute it and the first one inserted is kept
+    """
+    def lookup_(self, entries, key, make):
+        
+        with self.lock:
+            value = entries.get(key)
+            if value is not None:
+                self.hits += 1
+                entries.move_to_end(key)
+                return value
+            self.misses += 1
+        
+        value = make()
+        with self.lock:
+            value = entries.setdefault(key, value)
+            entries.move_to_end(key)
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    
+    """
+    Return a reward-free MDP holding the structural arrays for a grid
+    Parameters:
+        int size: size of grid
+        list blocked_states_list: each element is an x,y pair indicating a
+                                  state that cannot be traversed
+    Returns:
+        MDP object whose layout attribute holds the cached arrays
+    """
+    def get_layout_mdp(self, size, blocked_states_list):
+        
+        key = (size, frozenset(map(tuple, blocked_states_list)))
+        return self.lookup_(
+                self.layouts, key,
+                lambda: MDP({}, blocked_states_list, size=size,
+                            stats=self.solver_stats)
+            )
+    
+    
+    """
+    Return the per-state rewards for a grid, see MDP.get_rewards_
+    Parameters:
+        MDP layout_mdp: MDP for the grid as returned by get_layout_mdp
+        dict state_rewards_dict: (key,value) pairs of the form ((x,y), reward)
+    Returns:
+        array with shape (#states)
+    """
+    def get_rewards(self, layout_mdp, state_rewards_dict):
+        
+        key = (layout_mdp.size, frozenset(
+                (tuple(k), v) for k, v in state_rewards_dict.items()))
+        return self.lookup_(
+                self.rewards, key,
+                lambda: layout_mdp.get_rewards_(
+                        layout_mdp.states,
+                        layout_mdp.actions,
+                        state_rewards_dict
+                    )
+            )
+    
+    
+    """
+    Build an MDP from cached arrays; takes the same arguments as MDP
+    Returns:
+        MDP object
+    """
+    def get_mdp(self, state_rewards_dict={}, blocked_states_list=[],
+                discount=1, size=10, values=None, policy=None, stats=None):
+        
+        layout_mdp = self.get_layout_mdp(size, blocked_states_list)
+        rewards = self.get_rewards(layout_mdp, state_rewards_dict)
+        return MDP(state_rewards_dict, blocked_states_list, discount, size,
+                   values, policy, rewards=rewards, layout=layout_mdp.layout,
+                   stats=self.solver_stats if stats is None else stats)
+    
+    
+    """
+    Return the hit, miss and eviction counters and current entry counts
+    """
+    def stats(self):
+        
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'layouts': len(self.layouts),
+                    'rewards': len(self.rewards)}
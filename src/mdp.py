@@ -1,5 +1,9 @@
+import heapq
+import time
+
 import numpy as np
-import seaborn as sns
+
+from instrumentation import NULL_STATS
 
 
 class MDP:
@@ -17,49 +21,144 @@ class MDP:
         int size: size of the grid of actions
         list values: list of values for each state
         list policy: list of policies for each state
+        array rewards: optional reward model of shape (#states),
+                       (#states, #actions) or (#states, #actions, #states);
+                       defaults to the per-destination rewards given by
+                       state_rewards_dict, which a (#states) array replaces
+        dict layout: optional precomputed structural arrays for this size and
+                     blocked_states_list, as returned by get_layout_
+        SolverStats stats: optional instrumentation.SolverStats recording
+                           per-phase timings, iteration counts and array
+                           sizes; nothing is recorded if not given
+        bool compact: store coordinates, blocked states, next state indices
+                      and the policy in the smallest integer dtypes that
+                      hold them instead of int64; applies to layouts built
+                      by the MDP, a given layout is used as is
+        dtype: float dtype of the values and rewards, e.g. np.float32 to
+               halve their memory at the cost of precision
+        str backend: how action values are computed; 'table' gathers them
+                     through the transition table, 'stencil' shifts the
+                     (size, size) grid of values once per action, see
+                     get_stencil_action_values_. Both give identical results
     """
     def __init__(self, state_rewards_dict={},
                  blocked_states_list=[],
                  discount=1, size=10,
-                 values=None, policy=None):
+                 values=None, policy=None, rewards=None, layout=None,
+                 stats=None, compact=False, dtype=np.float64,
+                 backend='table'):
         
         self.state_rewards_dict = state_rewards_dict
         self.blocked_states_list = blocked_states_list
         self.discount = discount
         self.size = size
+        self.stats = NULL_STATS if stats is None else stats
+        self.compact = compact
+        self.dtype = np.dtype(dtype)
+        if backend not in ('table', 'stencil'):
+            raise ValueError(f"unknown backend '{backend}'")
+        self.backend = backend
+        self.policy_dtype = np.dtype(np.uint8 if compact else int)
         
-        self.states = self.get_states_(size)
-        self.actions = self.get_actions_()
-        self.blocked_states = self.get_blocked_states_(
-                self.states,
-                self.blocked_states_list
-            )
+        if layout is None:
+            with self.stats.phase('transitions'):
+                layout = self.get_layout_(size, blocked_states_list)
+                if compact:
+                    layout = self.get_compact_layout_(layout)
+        self.layout = layout
+        self.states = layout['states']
+        self.actions = layout['actions']
+        self.blocked_states = layout['blocked_states']
+        self.transitions = layout['transitions']
+        with self.stats.phase('rewards'):
+            if rewards is not None:
+                rewards = np.asarray(rewards, dtype=self.dtype)
+            if rewards is not None and rewards.ndim == 1:
+                self.state_rewards = rewards
+            else:
+                self.state_rewards = self.get_rewards_(
+                        self.states,
+                        self.actions,
+                        state_rewards_dict
+                    ).astype(self.dtype, copy=False)
+            if rewards is None:
+                self.rewards = self.state_rewards
+            else:
+                self.rewards = rewards
+            self.transition_rewards = self.get_transition_rewards_(
+                    self.rewards,
+                    self.transitions
+                )
+        if self.stats.enabled:
+            self.stats.gauge_max('transition_bytes_peak',
+                                 self.transitions.nbytes)
+            reward_bytes = self.rewards.nbytes
+            if self.transition_rewards is not None:
+                reward_bytes += self.transition_rewards.nbytes
+            self.stats.gauge_max('reward_bytes_peak', reward_bytes)
         
-        self.transitions = self.get_transitions_(
-                self.states,
-                self.actions,
-                self.blocked_states
-            )
-        self.rewards = self.get_rewards_(
-                self.states,
-                self.actions,
-                state_rewards_dict
-            )
+        # arrays passed in (e.g. from a LayoutCache) may be shared with other
+        # MDPs, so they are copied before the first incremental update
+        self.owns_arrays_ = layout is None and rewards is None
+        self.dirty_states = np.zeros(0, dtype=int)
         
         if values is None:
-            self.values = np.zeros(shape=self.states.shape[0])
+            self.values = np.zeros(shape=self.states.shape[0],
+                                   dtype=self.dtype)
         else:
-            self.values = values
+            self.values = np.asarray(values, dtype=self.dtype)
         if policy is None:
             self.policy = np.random.randint(
                     0,
                     self.actions.shape[0]-1,
                     size=self.states.shape[0]
-                )
+                ).astype(self.policy_dtype, copy=False)
         else:
             self.policy = policy
             
             
+    """
+    Take grid size and a list of blocked states and return the structural
+    arrays of the MDP, which do not depend on rewards or discount
+    Parameters:
+        int size: size of grid
+        list blocked_states_list: each element is an x,y pair indicating a
+                                  state that cannot be traversed
+    Returns:
+        dict with keys 'states', 'actions', 'blocked_states' and
+        'transitions'
+    """
+    def get_layout_(self, size, blocked_states_list):
+        
+        states = self.get_states_(size)
+        actions = self.get_actions_()
+        blocked_states = self.get_blocked_states_(states, blocked_states_list)
+        transitions = self.get_transitions_(states, actions, blocked_states)
+        return {'states': states, 'actions': actions,
+                'blocked_states': blocked_states, 'transitions': transitions}
+    
+    
+    """
+    Return a copy of a layout in compact dtypes: coordinates and actions in
+    int16 (int32 for grids larger than 32767), blocked states as booleans
+    and next state indices in the smallest unsigned dtype that holds the
+    sentinel #states, keeping the memory order of the transition table
+    Parameters:
+        dict layout: arrays as returned by get_layout_
+    Returns:
+        dict with the same keys as layout
+    """
+    def get_compact_layout_(self, layout):
+        
+        n_states = layout['transitions'].shape[0]
+        coordinate_dtype = np.int16 if self.size <= 2**15 - 1 else np.int32
+        return {'states': layout['states'].astype(coordinate_dtype),
+                'actions': layout['actions'].astype(coordinate_dtype),
+                'blocked_states': layout['blocked_states'].astype(bool),
+                'transitions': layout['transitions'].astype(
+                        np.min_scalar_type(n_states), order='K')}
+            
+            
     """
     Take grid size and return (size, 2) array of state x,y coordinates
     Parameters:
@@ -89,95 +188,288 @@ class MDP:
         return actions
     
     
+    """
+    Take an array of states and a list of x,y coordinates and return the
+    index of the state at each coordinate
+    Parameters:
+        array states: array of size (size, 2), where each element is the x,y
+                      coordinates of a state
+        list coordinates: each element is an x,y pair
+    Returns:
+        array of shape (len(coordinates)) of state indices, with -1 for
+        coordinates that are not a state
+    """
+    def get_state_indices_(self, states, coordinates):
+        
+        coordinates = np.asarray(coordinates, dtype=int).reshape(-1, 2)
+        upper = states.max(axis=0)
+        lookup = np.full(upper + 1, -1)
+        lookup[states[:,0], states[:,1]] = np.arange(states.shape[0])
+        
+        inside = ((coordinates >= 0) & (coordinates <= upper)).all(axis=1)
+        indices = np.full(coordinates.shape[0], -1)
+        indices[inside] = lookup[coordinates[inside,0], coordinates[inside,1]]
+        return indices
+    
+    
     """
     Take an array of states and a list of blocked states and return an
     array of states with 0/1 indicating if the state can be traversed
     Parameters:
         array states: array of size (size, 2), where each element is the x,y
                       coordinates of a state
-        list blocked_states_list: 
+        list blocked_states_list: each element is an x,y pair indicating a
+                                  state that cannot be traversed
     Returns:
         array of where each element is a 0 or 1, indicating whether each state
         can be traversed
     """
     def get_blocked_states_(self, states, blocked_states_list):
         
-        blocked_states = np.array(
-            [0 if tuple(state) in blocked_states_list
-            else 1 for state in states]
-            )
+        indices = self.get_state_indices_(states, list(blocked_states_list))
+        blocked_states = np.ones(states.shape[0], dtype=int)
+        blocked_states[indices[indices >= 0]] = 0
         return blocked_states
     
     
     """
-    Take arrays of states, actions and blocked states and return a (size, size)
-    array where each element indicates (0/1) the ability to transition between
-    two states
+    Take arrays of states, actions and blocked states and return a
+    (#states, #actions) table where each element is the index of the state
+    reached by taking action a from state s. Moves off the low edges of the
+    grid are clipped back onto it, while moves off the high edges or into a
+    blocked state lead nowhere and are given the sentinel index #states
     Parameters:
         array states: array of size (size, 2), where each element is the x,y
                       coordinates of a state
         array actions: (5, 2) array of actions; left, right, up, down, stay
         array blocked_states: array of where each element is a 0 or 1,
                               indicating whether each state can be traversed
+        array rows: optional array of state indices; if given, only the
+                    rows of these states are computed
     Returns:
-        (size, size) array where each element indicates whether each element
-        (s, s') indicates whether s' can be reached from s
+        (#states, #actions) array of next state indices, with #states
+        marking actions that cannot be taken
     """
-    def get_transitions_(self, states, actions, blocked_states):
+    def get_transitions_(self, states, actions, blocked_states, rows=None):
         
+        # compact layouts store coordinates in int16, too small for indices
+        upper = states.max(axis=0).astype(int)
+        from_states = (states if rows is None else states[rows]).astype(int)
         states_new = np.clip(
-                states[:,None] + actions[None,:],
+                from_states[:,None] + actions[None,:],
                 a_min=0,
-                a_max=states.size-1
+                a_max=None
             )
-        transitions = (
-                states[None,:,None,:] == states_new[:,None]
-                ).all(axis=3).transpose(0,2,1).astype(int)
+        in_grid = (states_new <= upper).all(axis=2)
         
-        transitions = transitions * blocked_states[None,None,:]
+        states_new = np.minimum(states_new, upper)
+        transitions = states_new[:,:,0]*(upper[1] + 1) + states_new[:,:,1]
+        
+        valid = in_grid & (blocked_states[transitions] == 1)
+        transitions[~valid] = states.shape[0]
         return transitions
     
     
     """
     Take arrays of states, actions a dictionary of rewards and returns an array
-    with shape (#states, #actions, #states) where each element indicates the
-    reward gained from moving from state s to state s' from action a
+    with shape (#states) where each element is the reward gained from moving
+    into that state. Rewards depend only on the destination state, so this is
+    all that is needed to compute the reward of any transition (s, a, s')
     Parameters:
         array states: array of size (size, 2), where each element is the x,y
                       coordinates of a state
         array actions: (5, 2) array of actions; left, right, up, down, stay
         dict state_rewards_dict: (key,value) pairs of the form ((x,y), reward)
     Returns:
-        array with shape (#states, #actions, #states)
+        array with shape (#states)
     """
     def get_rewards_(self, states, actions, state_rewards_dict):
         
-        state_rewards = np.array(
-            [state_rewards_dict[tuple(state)] if tuple(state) in state_rewards_dict
-            else 0 for state in states]
-            )
-        
-        rewards =(
-                state_rewards[None,:] * np.ones(len(state_rewards))[:,None]
-        )[:,None,:] * np.ones(len(actions))[None,:,None]
+        indices = self.get_state_indices_(states, list(state_rewards_dict))
+        state_rewards = np.fromiter(state_rewards_dict.values(), dtype=float,
+                                    count=len(state_rewards_dict))
+        rewards = np.zeros(states.shape[0])
+        rewards[indices[indices >= 0]] = state_rewards[indices >= 0]
         return rewards
     
     
     """
-    Expand list of values or policy of shape (#actions) to one of shape
-    (#states, #actions, #states)
+    Take a reward model and the transition table and return the reward
+    gained by each (state, action) pair. Not needed when rewards depend only
+    on the destination state, since backups then add rewards to the values
+    once per sweep
     Parameters:
-        array actions: (5, 2) array of actions; left, right, up, down, stay
-        array array: array of shape (#states) of either values or policies
+        array rewards: array of shape (#states), (#states, #actions) or
+                       (#states, #actions, #states)
+        array transitions: (#states, #actions) array of next state indices
     Returns:
-        array with shape (#states, #actions, #states)
+        array with shape (#states, #actions), or None for per-destination
+        rewards; actions that cannot be taken give no reward
+    """
+    def get_transition_rewards_(self, rewards, transitions):
+        
+        n_states = transitions.shape[0]
+        valid = transitions < n_states
+        if rewards.ndim == 1:
+            return None
+        elif rewards.ndim == 2:
+            transition_rewards = rewards.copy()
+        elif rewards.ndim == 3:
+            transition_rewards = np.take_along_axis(
+                    rewards,
+                    np.minimum(transitions, n_states-1)[:,:,None],
+                    axis=2
+                )[:,:,0]
+        else:
+            raise ValueError("rewards must have 1, 2 or 3 dimensions")
+        transition_rewards[~valid] = 0
+        return transition_rewards
+    
+    
+    """
+    Compute the value of taking each action in each state given state values
+    Parameters:
+        array values: array of shape (#states) of state values
+        array policy: optional array with one action per state; if given,
+                      only the value of that action is computed
+        array states: optional array of state indices; if given, only these
+                      states are computed and policy is aligned with them
+    Returns:
+        array with shape (#states, #actions), or (#states) if a policy is
+        given; actions that cannot be taken are worth 0
+    """
+    def get_action_values_(self, values, policy=None, states=None):
+        
+        if self.backend == 'stencil':
+            # (#actions, #states), whose transpose is a (#states, #actions)
+            # view in the same memory order as the transition table
+            action_values = self.get_stencil_action_values_(values)
+            if states is not None:
+                action_values = action_values[:,states]
+            if policy is not None:
+                return action_values[policy,
+                                     np.arange(action_values.shape[1])]
+            return action_values.T
+        
+        transitions = self.transitions
+        transition_rewards = self.transition_rewards
+        if states is not None:
+            transitions = transitions[states]
+            if transition_rewards is not None:
+                transition_rewards = transition_rewards[states]
+        if policy is not None:
+            rows = np.arange(transitions.shape[0])
+            transitions = transitions[rows, policy]
+            if transition_rewards is not None:
+                transition_rewards = transition_rewards[rows, policy]
+        
+        # the sentinel is appended in the value dtype, a plain 0 would
+        # promote float32 values to float64
+        if transition_rewards is None:
+            target = np.append(self.rewards + self.discount*values,
+                               self.dtype.type(0))
+            return target[transitions]
+        
+        action_values = np.append(self.discount*values,
+                                  self.dtype.type(0))[transitions]
+        action_values += transition_rewards
+        return action_values
+    
+    
+    """
+    Compute the value of taking each action in each state by shifting the
+    (size, size) grid of backed up destination values once per action,
+    without the transition table. Matches the table: moves off the low
+    edges are clipped back onto the grid, while moves off the high edges or
+    into a blocked state are worth 0
+    Parameters:
+        array values: array of shape (#states) of state values
+    Returns:
+        array with shape (#actions, #states)
+    """
+    def get_stencil_action_values_(self, values):
+        
+        size = self.size
+        if self.transition_rewards is None:
+            target = self.rewards + self.discount*values
+        else:
+            target = self.discount*np.asarray(values)
+        target = target.reshape(size, size)
+        target[(self.blocked_states == 0).reshape(size, size)] = 0
+        
+        action_values = np.empty((self.actions.shape[0], size, size),
+                                 dtype=target.dtype)
+        for action, shift in enumerate(self.actions):
+            self.shift_image_(target, shift, action_values[action])
+        action_values = action_values.reshape(self.actions.shape[0], -1)
+        if self.transition_rewards is not None:
+            action_values += self.transition_rewards.T
+        return action_values
+    
+    
+    """
+    Compute the value of the best action in each state on the grid, taking
+    running maxima of shifted slices of the grid in place instead of
+    building the value of every action. Needs per-state rewards
+    Parameters:
+        array values: array of shape (#states) of state values
+    Returns:
+        array of shape (#states)
+    """
+    def get_stencil_values_(self, values):
+        
+        size = self.size
+        target = (self.rewards + self.discount*values).reshape(size, size)
+        target[(self.blocked_states == 0).reshape(size, size)] = 0
+        
+        best = np.empty_like(target)
+        self.shift_image_(target, self.actions[0], best)
+        for shift in self.actions[1:]:
+            if np.count_nonzero(shift) > 1:
+                shifted = np.empty_like(target)
+                self.shift_image_(target, shift, shifted)
+                np.maximum(best, shifted, out=best)
+            elif not shift.any():
+                np.maximum(best, target, out=best)
+            else:
+                axis = int(np.flatnonzero(shift)[0])
+                src = np.moveaxis(target, axis, 0)
+                dst = np.moveaxis(best, axis, 0)
+                if shift[axis] < 0:
+                    np.maximum(dst[1:], src[:-1], out=dst[1:])
+                    np.maximum(dst[0], src[0], out=dst[0])
+                else:
+                    np.maximum(dst[:-1], src[1:], out=dst[:-1])
+                    np.maximum(dst[-1], 0, out=dst[-1])
+        return best.reshape(-1)
+    
+    
+    """
+    Write the grid image moved by an action into out, so that out[x, y] is
+    the image at the cell the action leads to from (x, y)
+    Parameters:
+        array image: (size, size) array
+        array shift: change to the x and y coordinates, each -1, 0 or 1
+        array out: (size, size) array to write to
+    Returns: None
     """
-    def expand_array_(self, actions, array):
+    def shift_image_(self, image, shift, out):
         
-        expanded_values =(
-                array[None,:] * np.ones(array.shape)[:,None]
-        )[:,None,:] * np.ones(actions.shape[0])[None,:,None]
-        return expanded_values
+        source = image
+        for axis, step in enumerate(shift):
+            if step == 0:
+                continue
+            src = np.moveaxis(source, axis, 0)
+            dst = np.moveaxis(out, axis, 0)
+            if step < 0:
+                dst[1:] = src[:-1]
+                dst[0] = src[0]
+            else:
+                dst[:-1] = src[1:]
+                dst[-1] = 0
+            source = out
+        if source is image:
+            out[...] = image
     
     
     """
@@ -187,9 +479,10 @@ class MDP:
     """
     def evaluate_values(self):
         
-        expanded_values = self.expand_array_(self.actions, self.values)
-        return (self.transitions*(self.rewards + self.discount*expanded_values)
-                ).sum(axis=2).max(axis=1)
+        with self.stats.phase('backup'):
+            if self.backend == 'stencil' and self.transition_rewards is None:
+                return self.get_stencil_values_(self.values)
+            return self.get_action_values_(self.values).max(axis=1)
         
     
     """
@@ -200,17 +493,31 @@ class MDP:
     """
     def optimize_policy(self):
         
-        expanded_values = self.expand_array_(self.actions, self.values)
-        return (self.transitions*(self.rewards + self.discount*expanded_values)
-                ).sum(axis=2).argmax(axis=1)
+        with self.stats.phase('argmax'):
+            return self.get_action_values_(self.values).argmax(axis=1).astype(
+                    self.policy_dtype, copy=False)
+    
+    
+    """
+    Return the Bellman residual of the current values, the largest change
+    a further synchronous sweep would make to any state
+    Returns:
+        float
+    """
+    def get_bellman_residual(self):
+        
+        return float(np.abs(
+                self.get_action_values_(self.values).max(axis=1) - self.values
+            ).max())
         
         
     def optimize_policy2(self):
         
-        expanded_values = self.expand_array_(self.actions, self.values)
-        transitions = np.nan_to_num(self.transitions / self.transitions.sum(axis=1)[:,None,:])
-        return (transitions*(self.rewards + self.discount*expanded_values)
-                ).sum(axis=2).argmax(axis=1)
+        action_values = self.get_action_values_(self.values)
+        n_actions = (
+                self.transitions[:,:,None] == self.transitions[:,None,:]
+            ).sum(axis=2)
+        return (action_values / n_actions).argmax(axis=1)
         
         
     """
@@ -218,21 +525,622 @@ class MDP:
     Parameters:
         int max_iters: maximum number of iterations allowed before convergence
         float eps: maximum distance allowed for convergence
-    Returns: None
+        str method: 'jacobi' to update every state from the previous values,
+                    'gauss-seidel' to update states in place,
+                    'prioritized' for prioritized sweeping, where eps is the
+                    smallest Bellman error worth propagating, or 'frontier'
+                    to only sweep outwards from the states changed by
+                    set_blocked/set_reward, where eps is the smallest change
+                    in a state value worth propagating, 'shortest-path'
+                    to solve exactly from grid distances, falling back to
+                    'jacobi' when the rewards do not allow it, see
+                    get_shortest_path_values_, or 'multigrid' to warm start
+                    'jacobi' from the solution of ever coarser grids, see
+                    multigrid_
+        str stop: stopping rule of the 'jacobi' and 'multigrid' methods, see
+                  is_converged_
+        int min_size: grid size below which 'multigrid' stops coarsening
+    Returns:
+        dict with the method used, which is 'jacobi' if 'shortest-path' or
+        'multigrid' fell back, the number of iterations (full sweeps, or
+        sweep equivalents for prioritized sweeping, 0 for shortest paths,
+        sweeps of the full grid for multigrid), the number of single state
+        backups and the wall-clock seconds taken. 'multigrid' adds a list of
+        levels from the coarsest, each a dict with the grid size, sweeps
+        and seconds taken
+    """
+    def value_iteration(self, max_iters=100, eps=.001, method='jacobi',
+                        stop='l2', min_size=16):
+        
+        start = time.perf_counter()
+        if method == 'shortest-path':
+            values = self.get_shortest_path_values_()
+            if values is None:
+                method = 'jacobi'
+            else:
+                self.values = values
+                i, backups = 0, 0
+        levels = None
+        if method == 'multigrid':
+            if self.transition_rewards is None:
+                levels = self.multigrid_(max_iters, eps, stop, min_size)
+                i = levels[-1]['iterations']
+                backups = sum(level['iterations']*level['size']**2
+                              for level in levels)
+            else:
+                method = 'jacobi'
+        if method == 'jacobi':
+            i = 0
+            for snapshot in self.iter_value_iteration(max_iters, eps,
+                                                      stop=stop):
+                i = snapshot['iteration']
+            backups = i*self.states.shape[0]
+        elif method == 'gauss-seidel':
+            i, backups = self.gauss_seidel_(max_iters, eps)
+        elif method == 'prioritized':
+            i, backups = self.prioritized_sweeping_(max_iters, eps)
+        elif method == 'frontier':
+            i, backups = self.frontier_sweeping_(max_iters, eps)
+        elif method not in ('shortest-path', 'multigrid'):
+            raise ValueError(f"unknown value iteration method '{method}'")
+        if method not in ('jacobi', 'multigrid'):
+            self.policy = self.optimize_policy()
+        seconds = time.perf_counter() - start
+        if self.stats.enabled:
+            self.stats.add_time('value_iteration', seconds)
+            self.stats.count('value_iteration_iterations', i)
+            self.stats.count('backups', backups)
+            self.stats.gauge('bellman_residual', self.get_bellman_residual())
+        result = {'method': method, 'iterations': i, 'backups': backups,
+                  'seconds': seconds}
+        if levels is not None:
+            result['levels'] = levels
+        return result
+    
+    
+    """
+    Test a stopping rule on the change made by one Bellman backup. Besides
+    a bound on the L2 norm of the change, two rules bound the suboptimality
+    of the greedy policy by eps (Puterman, Markov Decision Processes, 6.3
+    and 6.6), for discounts below 1: 'sup' stops once the largest change is
+    below eps(1-d)/2d and 'span' once the span seminorm of the change (its
+    largest minus its smallest element) is below eps(1-d)/d, for discount d.
+    Actions that cannot be taken lead to a state worth 0 whose value never
+    changes, so 0 counts towards the span. With discount 0 a backup does not
+    depend on the values backed up, so both rules stop after one backup
+    Parameters:
+        array change: backed up values minus the values they were backed up
+                      from
+        float eps: tolerance of the rule
+        str stop: 'l2', 'sup' or 'span'
+    Returns:
+        boolean
+    """
+    def is_converged_(self, change, eps, stop='l2'):
+        
+        if stop == 'l2':
+            return np.sqrt(change.dot(change)) <= eps
+        if stop not in ('sup', 'span'):
+            raise ValueError(f"unknown stopping rule '{stop}'")
+        if self.discount >= 1:
+            raise ValueError(f"stopping rule '{stop}' requires discount < 1")
+        if self.discount == 0:
+            return True
+        if stop == 'sup':
+            return (np.abs(change).max()
+                    < eps*(1 - self.discount)/(2*self.discount))
+        return (max(change.max(), 0) - min(change.min(), 0)
+                < eps*(1 - self.discount)/self.discount)
+    
+    
+    """
+    Return the constant to add to backed up values that met the 'span'
+    stopping rule, the midpoint of the bounds on the optimal values it
+    implies, so that they are within eps/2 of the optimal values
+    Parameters:
+        array change: backed up values minus the values they were backed up
+                      from
+    Returns:
+        float
     """
-    def value_iteration(self, max_iters=100, eps=.001):
+    def get_span_offset_(self, change):
         
+        scale = self.discount/(1 - self.discount)
+        return scale*(max(change.max(), 0) + min(change.min(), 0))/2
+    
+    
+    """
+    Run value iteration from a warm start prolonged from the solution of a
+    coarser grid, built by get_coarse_mdp_ and solved the same way, so
+    values spread across the coarse grids in few sweeps and the full grid
+    only needs to correct them locally. Starting values are replaced by the
+    prolonged ones, except on the coarsest level, a grid smaller than
+    2*min_size, which runs value iteration from its current values
+    Parameters:
+        int max_iters: maximum number of sweeps on each level
+        float eps: tolerance of the stopping rule on each level
+        str stop: stopping rule, see is_converged_
+        int min_size: grid size below which no coarser level is built
+    Returns:
+        list of dicts with the size, sweeps and seconds of each level,
+        from the coarsest to this grid
+    """
+    def multigrid_(self, max_iters, eps, stop, min_size):
+        
+        levels = []
+        if self.size >= 2*min_size:
+            coarse = self.get_coarse_mdp_()
+            levels = coarse.multigrid_(max_iters, eps, stop, min_size)
+            grid = coarse.values.reshape(coarse.size, coarse.size)
+            grid = grid.repeat(2, axis=0).repeat(2, axis=1)
+            self.values = grid[:self.size,:self.size].ravel().astype(
+                    self.dtype)
+            # states walled off from every reward are worth 0 but may be
+            # merged with reachable ones on the coarse grid, and values
+            # too high only shrink by the discount on each sweep
+            distances = self.get_distances_(np.flatnonzero(
+                    self.rewards*self.blocked_states))
+            self.values[distances < 0] = 0
+        
+        start = time.perf_counter()
         i = 0
-        diff_size = np.inf
-        while i < max_iters and diff_size > eps:
+        for snapshot in self.iter_value_iteration(max_iters, eps, stop=stop):
+            i = snapshot['iteration']
+        levels.append({'size': self.size, 'iterations': i,
+                       'seconds': time.perf_counter() - start})
+        return levels
+    
+    
+    """
+    Return an MDP on a grid of half the size, where each state stands for
+    a 2x2 block of this grid. A move of the coarse grid spans two moves of
+    this one, so its discount is the square of this discount, and the
+    reward of a block is what staying on its best open state collects over
+    two moves. A block is blocked when fewer than half of its states are
+    open, counting states past the edge of odd sized grids as blocked. The
+    coarse policy starts at action 0 rather than at random, so building it
+    leaves the global random state alone
+    Returns:
+        MDP
+    """
+    def get_coarse_mdp_(self):
+        
+        size = self.size
+        coarse_size = (size + 1)//2
+        padding = ((0, 2*coarse_size - size),)*2
+        is_open = np.pad((self.blocked_states == 1).reshape(size, size),
+                         padding)
+        rewards = np.pad(self.rewards.reshape(size, size), padding)
+        rewards = np.where(is_open, rewards, -np.inf)
+        
+        blocks = (coarse_size, 2, coarse_size, 2)
+        open_count = is_open.reshape(blocks).sum(axis=(1, 3)).ravel()
+        block_rewards = rewards.reshape(blocks).max(axis=(1, 3)).ravel()
+        block_rewards[open_count == 0] = 0
+        blocked = np.flatnonzero(2*open_count < 4)
+        return MDP(
+                blocked_states_list=[divmod(int(b), coarse_size)
+                                     for b in blocked],
+                discount=self.discount**2,
+                size=coarse_size,
+                rewards=(1 + self.discount)*block_rewards,
+                policy=np.zeros(coarse_size**2, dtype=int),
+                stats=self.stats,
+                dtype=self.dtype,
+                backend=self.backend
+            )
+    
+    
+    """
+    Describe one iteration of a solver without copying full arrays unless
+    asked to
+    Parameters:
+        int iteration: iteration number, starting at 1
+        array diff: change in values over the iteration
+        bool deltas: include the indices and new values of changed states
+        bool copy: include a copy of the full values and policy
+    Returns:
+        dict with the iteration, residual (L2 norm of diff), number of
+        changed states, and optionally 'delta' and 'values'/'policy'
+    """
+    def get_snapshot_(self, iteration, diff, deltas=False, copy=False):
+        
+        changed = np.flatnonzero(diff)
+        snapshot = {'iteration': iteration,
+                    'residual': float(np.sqrt(diff.dot(diff))),
+                    'changed': changed.size}
+        if deltas:
+            snapshot['delta'] = (changed, self.values[changed])
+        if copy:
+            snapshot['values'] = np.array(self.values, copy=True)
+            snapshot['policy'] = np.array(self.policy, copy=True)
+        return snapshot
+    
+    
+    """
+    Generator version of value_iteration (with synchronous sweeps) that
+    yields a snapshot after every sweep, see get_snapshot_. self.values is
+    updated as the generator advances and self.policy is set once it is
+    exhausted; consumers that stop early can call optimize_policy
+    Parameters:
+        int max_iters: maximum number of iterations allowed before convergence
+        float eps: maximum distance allowed for convergence
+        bool deltas: include the changed states and their new values
+        bool copy: include copies of the full values and policy
+        str stop: stopping rule, see is_converged_; values that meet the
+                  'span' rule are moved by get_span_offset_
+    Returns:
+        generator of snapshot dicts
+    """
+    def iter_value_iteration(self, max_iters=100, eps=.001, deltas=False,
+                             copy=False, stop='l2'):
+        
+        i = 0
+        converged = False
+        while i < max_iters and not converged:
             prev_values = self.values
             self.values = self.evaluate_values()
-            diff = prev_values - self.values
-            diff_size = np.sqrt(diff.dot(diff))
+            change = self.values - prev_values
+            converged = self.is_converged_(change, eps, stop)
+            if converged and stop == 'span':
+                self.values = self.values + self.get_span_offset_(change)
             i+=1
+            yield self.get_snapshot_(i, prev_values - self.values, deltas,
+                                     copy)
         self.policy = self.optimize_policy()
     
     
+    """
+    Value iteration with in-place updates. Every action moves to a
+    neighbouring cell or stays put, so cells of one checkerboard colour only
+    depend on cells of the other colour (and themselves); updating one colour
+    at a time from the latest values is a Gauss-Seidel sweep
+    Parameters:
+        int max_iters: maximum number of sweeps allowed before convergence
+        float eps: maximum distance allowed for convergence
+    Returns:
+        tuple of the number of sweeps and the number of state backups
+    """
+    def gauss_seidel_(self, max_iters, eps):
+        
+        n_states = self.states.shape[0]
+        action_rewards = self.get_action_values_(np.zeros(n_states, self.dtype))
+        colors = self.states.sum(axis=1) % 2
+        # column-major tables keep the max over actions a vectorized
+        # reduction across whole columns rather than one per row
+        sweeps = []
+        for c in (0, 1):
+            states = np.flatnonzero(colors == c)
+            sweeps.append((states,
+                           np.asfortranarray(self.transitions[states]),
+                           np.asfortranarray(action_rewards[states])))
+        values = np.append(np.array(self.values, dtype=self.dtype),
+                           self.dtype.type(0))
+        
+        i = 0
+        diff_size = np.inf
+        while i < max_iters and diff_size > eps:
+            prev_values = values.copy()
+            for states, transitions, rewards in sweeps:
+                values[states] = (
+                        rewards + self.discount*values[transitions]
+                    ).max(axis=1)
+            diff = prev_values - values
+            diff_size = np.sqrt(diff.dot(diff))
+            i+=1
+        self.values = values[:-1]
+        return i, i*n_states
+    
+    
+    """
+    Take the transition table and return, for each state, the states that
+    can move into it
+    Parameters:
+        array transitions: (#states, #actions) array of next state indices
+    Returns:
+        tuple (offsets, predecessors) where predecessors[offsets[s]:offsets[s+1]]
+        are the states with an action leading to s
+    """
+    def get_predecessors_(self, transitions):
+        
+        n_states, n_actions = transitions.shape
+        order = np.argsort(transitions.ravel(), kind='stable')
+        counts = np.bincount(transitions.ravel(), minlength=n_states+1)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return offsets, order // n_actions
+    
+    
+    """
+    Solve the MDP exactly without sweeps when every reachable reward is the
+    same positive amount r. Transitions are deterministic, so the best plan
+    is to reach a rewarding state in as few moves k as possible and stay
+    there, collecting r on every move from the k-th on, which is worth
+    r d^(k-1)/(1-d) for discount d. k is the length of the shortest path
+    into a rewarding state, found by a breadth-first search backwards from
+    those states over the predecessors of each state; all moves cost one
+    step, so this gives the same distances as Dijkstra's algorithm in
+    linear time. States that cannot reach a reward are worth 0
+    Returns:
+        array of shape (#states) of optimal state values, or None if rewards
+        depend on the action or differ between open states, a reward is
+        negative or the discount is not below 1
+    """
+    def get_shortest_path_values_(self):
+        
+        if self.transition_rewards is not None or not 0 <= self.discount < 1:
+            return None
+        # rewards of blocked states are never collected
+        rewards = np.where(self.blocked_states == 1, self.rewards, 0)
+        targets = np.flatnonzero(rewards)
+        reward = rewards[targets[0]] if targets.size else 0
+        if reward < 0 or (rewards[targets] != reward).any():
+            return None
+        
+        distances = self.get_distances_(targets)
+        values = np.zeros(self.states.shape[0], dtype=self.dtype)
+        reached = distances > 0
+        values[reached] = (reward*self.discount**(distances[reached] - 1)
+                           / (1 - self.discount))
+        return values
+    
+    
+    """
+    Return the fewest moves each state needs to move into one of the
+    targets, by a breadth-first search over the predecessors of each state
+    Parameters:
+        array targets: array of state indices
+    Returns:
+        array of shape (#states), -1 for states that cannot reach a target
+    """
+    def get_distances_(self, targets):
+        
+        offsets, predecessors = self.get_predecessors_(self.transitions)
+        distances = np.full(self.states.shape[0], -1)
+        # staying counts as a move, so targets are found at distance 1
+        frontier = np.asarray(targets, dtype=int)
+        k = 0
+        while frontier.size:
+            k += 1
+            # concatenate the predecessor segments of the frontier states
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            ends = np.cumsum(counts)
+            segments = (np.repeat(starts - ends + counts, counts)
+                        + np.arange(ends[-1]))
+            candidates = predecessors[segments]
+            candidates = candidates[distances[candidates] < 0]
+            # of repeated candidates, keep the one whose write sticks
+            distances[candidates] = np.arange(candidates.size)
+            frontier = candidates[distances[candidates]
+                                  == np.arange(candidates.size)]
+            distances[frontier] = k
+        return distances
+    
+    
+    """
+    Take an array of state indices and return the states that may have an
+    action leading into any of them: their neighbours and themselves
+    Parameters:
+        array indices: array of state indices
+    Returns:
+        sorted array of unique state indices
+    """
+    def get_neighbors_(self, indices):
+        
+        # states are laid out by get_states_, so coordinates map to indices
+        # arithmetically, in int since compact coordinates are int16
+        max_x, max_y = self.states[-1].astype(int)
+        states = self.states[indices].astype(int)
+        x = states[:,0][:,None] - self.actions[None,:,0]
+        y = states[:,1][:,None] - self.actions[None,:,1]
+        inside = (x >= 0) & (x <= max_x) & (y >= 0) & (y <= max_y)
+        
+        neighbors = np.zeros(self.states.shape[0], dtype=bool)
+        neighbors[(x*(max_y + 1) + y)[inside]] = True
+        neighbors[indices] = True
+        return np.flatnonzero(neighbors)
+    
+    
+    """
+    Value iteration restricted to a frontier of states: starting from the
+    states changed since the last solve (or all states if none were
+    recorded), back up the frontier, then move it to the neighbours of the
+    states whose value changed by more than eps
+    Parameters:
+        int max_iters: maximum number of frontier sweeps
+        float eps: smallest change in a state value worth propagating
+    Returns:
+        tuple of the number of sweeps and the number of state backups
+    """
+    def frontier_sweeping_(self, max_iters, eps):
+        
+        n_states = self.states.shape[0]
+        values = np.append(np.array(self.values, dtype=self.dtype),
+                           self.dtype.type(0))
+        # (#actions, #states) row-major, so that maxima over actions of a
+        # frontier reduce whole rows
+        transitions_t = np.ascontiguousarray(self.transitions.T)
+        if self.transition_rewards is None:
+            rewards = np.append(self.rewards, self.dtype.type(0))
+        else:
+            rewards_t = np.ascontiguousarray(self.transition_rewards.T)
+        if self.dirty_states.size:
+            frontier = self.dirty_states
+        else:
+            frontier = np.arange(n_states)
+        
+        # small frontiers avoid get_action_values_, which adds rewards and
+        # values over all states
+        i = 0
+        backups = 0
+        while i < max_iters and frontier.size:
+            if 4*frontier.size > n_states:
+                # a full sweep is cheaper than gathering a large frontier
+                frontier = np.arange(n_states)
+                new_values = self.get_action_values_(values[:-1]).max(axis=1)
+            else:
+                transitions = np.take(transitions_t, frontier, axis=1)
+                if self.transition_rewards is None:
+                    action_values = rewards[transitions]
+                else:
+                    action_values = np.take(rewards_t, frontier, axis=1)
+                action_values += self.discount*values[transitions]
+                new_values = action_values.max(axis=0)
+            changed = frontier[np.abs(new_values - values[frontier]) > eps]
+            values[frontier] = new_values
+            backups += frontier.size
+            frontier = self.get_neighbors_(changed)
+            i+=1
+        self.values = values[:-1]
+        self.dirty_states = np.zeros(0, dtype=int)
+        return i, backups
+    
+    
+    """
+    Copy arrays that may be shared with other MDPs before they are updated
+    in place
+    """
+    def own_arrays_(self):
+        
+        if self.owns_arrays_:
+            return
+        self.blocked_states = self.blocked_states.copy()
+        self.transitions = self.transitions.copy(order='K')
+        self.layout = dict(self.layout, blocked_states=self.blocked_states,
+                           transitions=self.transitions)
+        if self.rewards is self.state_rewards:
+            self.rewards = self.state_rewards = self.state_rewards.copy()
+        else:
+            self.state_rewards = self.state_rewards.copy()
+        self.owns_arrays_ = True
+    
+    
+    """
+    Block or unblock a single state, updating only the transitions of the
+    states that can move into it. The values and policy are kept so that
+    the next solve starts from them; value_iteration(method='frontier')
+    only sweeps the region around the change
+    Parameters:
+        tuple cell: x,y coordinates of the state
+        bool blocked: whether the state can not be traversed
+    Returns: None
+    """
+    def set_blocked(self, cell, blocked=True):
+        
+        index = self.get_state_indices_(self.states, [cell])[0]
+        if index < 0:
+            raise ValueError(f"{cell} is not a state")
+        self.own_arrays_()
+        
+        cell = tuple(cell)
+        blocked_states_list = [tuple(s) for s in self.blocked_states_list
+                               if tuple(s) != cell]
+        if blocked:
+            blocked_states_list.append(cell)
+        self.blocked_states_list = blocked_states_list
+        self.blocked_states[index] = 0 if blocked else 1
+        
+        rows = self.get_neighbors_(np.array([index]))
+        self.transitions[rows] = self.get_transitions_(
+                self.states,
+                self.actions,
+                self.blocked_states,
+                rows
+            )
+        if self.transition_rewards is not None:
+            self.transition_rewards = self.get_transition_rewards_(
+                    self.rewards,
+                    self.transitions
+                )
+        self.dirty_states = np.union1d(self.dirty_states, rows)
+    
+    
+    """
+    Set the reward for moving into a single state. The values and policy
+    are kept so that the next solve starts from them;
+    value_iteration(method='frontier') only sweeps the region around the
+    change
+    Parameters:
+        tuple cell: x,y coordinates of the state
+        float reward: new reward
+    Returns: None
+    """
+    def set_reward(self, cell, reward):
+        
+        if self.transition_rewards is not None:
+            raise ValueError("set_reward requires per-state rewards")
+        index = self.get_state_indices_(self.states, [cell])[0]
+        if index < 0:
+            raise ValueError(f"{cell} is not a state")
+        self.own_arrays_()
+        
+        self.state_rewards_dict = dict(self.state_rewards_dict)
+        self.state_rewards_dict[tuple(cell)] = reward
+        self.state_rewards[index] = reward
+        self.dirty_states = np.union1d(
+                self.dirty_states,
+                self.get_neighbors_(np.array([index]))
+            )
+    
+    
+    """
+    Value iteration by prioritized sweeping: states are backed up one at a
+    time in order of their Bellman error, and only the predecessors of an
+    updated state have their error recomputed
+    Parameters:
+        int max_iters: budget of sweep equivalents (max_iters*#states backups)
+        float eps: smallest Bellman error worth propagating
+    Returns:
+        tuple of the number of sweep equivalents and the number of backups
+    """
+    def prioritized_sweeping_(self, max_iters, eps):
+        
+        n_states = self.states.shape[0]
+        discount = self.discount
+        offsets, predecessors = self.get_predecessors_(self.transitions)
+        action_rewards = self.get_action_values_(np.zeros(n_states, self.dtype))
+        values = np.append(np.array(self.values, dtype=self.dtype),
+                           self.dtype.type(0))
+        errors = np.abs(
+                (action_rewards + discount*values[self.transitions]).max(axis=1)
+                - values[:-1]
+            )
+        queue = [(-errors[s], s) for s in np.flatnonzero(errors > eps).tolist()]
+        heapq.heapify(queue)
+        
+        # single state backups are done on python lists, which is much faster
+        # than numpy for arrays of #actions elements
+        transitions = self.transitions.tolist()
+        action_rewards = action_rewards.tolist()
+        values = values.tolist()
+        errors = errors.tolist()
+        offsets = offsets.tolist()
+        predecessors = predecessors.tolist()
+        
+        def backup(state):
+            return max(r + discount*values[s] for r, s in
+                       zip(action_rewards[state], transitions[state]))
+        
+        backups = 0
+        while queue and backups < max_iters*n_states:
+            error, state = heapq.heappop(queue)
+            if -error != errors[state]:
+                continue
+            values[state] = backup(state)
+            errors[state] = 0
+            backups += 1
+            
+            for pred in set(predecessors[offsets[state]:offsets[state+1]]):
+                error = abs(backup(pred) - values[pred])
+                if error != errors[pred]:
+                    errors[pred] = error
+                    if error > eps:
+                        heapq.heappush(queue, (-error, pred))
+        values = np.array(values, dtype=self.dtype)
+        self.values = values[:-1]
+        return int(np.ceil(backups / n_states)), backups
+    
+    
     """
     Update values for each state given current state values and the current
     policy
@@ -242,24 +1150,79 @@ class MDP:
     """
     def evaluate_policy_values(self):
         
-        expanded_values = self.expand_array_(self.actions, self.values)
-        values = (
-                self.transitions*(self.rewards + self.discount*expanded_values)
-            ).sum(axis=2)
-        policy_values = np.array(
-                [values[i][self.policy[i]] for i in range(values.shape[0])]
+        with self.stats.phase('backup'):
+            return self.get_action_values_(self.values, self.policy)
+    
+    
+    """
+    Solve the linear system (I - discount*P)V = r for the values of the
+    current policy, where P is the sparse transition matrix of the policy and
+    r the reward it collects from each state, with a sparse LU solve. Each
+    row of P has at most one entry, so the factorization adds little fill
+    Returns:
+        array of shape (#states) where each element is the value of that
+        state under the current policy
+    """
+    def solve_policy_values_(self):
+        
+        import scipy.sparse
+        import scipy.sparse.linalg
+        
+        n_states = self.states.shape[0]
+        next_states = self.transitions[np.arange(n_states), self.policy]
+        valid = next_states < n_states
+        policy_transitions = scipy.sparse.csr_matrix(
+                (np.ones(valid.sum()),
+                 (np.arange(n_states)[valid], next_states[valid])),
+                shape=(n_states, n_states)
             )
-        return policy_values
+        system = (scipy.sparse.identity(n_states, format='csr')
+                  - self.discount*policy_transitions)
+        policy_rewards = self.get_action_values_(
+                np.zeros(n_states),
+                self.policy
+            ).astype(float, copy=False)
+        return scipy.sparse.linalg.spsolve(system.tocsc(), policy_rewards)
     
     
     """
     Update values until convergence given the current policy
+    Parameters:
+        int max_iters: maximum number of iterations allowed before
+                       convergence; 'iterative' only
+        float eps: maximum distance allowed for convergence; 'iterative' only
+        str method: 'iterative' to repeatedly apply evaluate_policy_values or
+                    'direct' to solve for the values exactly, see
+                    solve_policy_values_
+    Returns: None
+    """
+    def policy_evaluation(self, max_iters=100, eps=.001, method='iterative'):
+        
+        if method not in ('iterative', 'direct'):
+            raise ValueError(f"unknown policy evaluation method '{method}'")
+        with self.stats.phase('policy_evaluation'):
+            if method == 'direct':
+                self.values = self.solve_policy_values_().astype(
+                        self.dtype, copy=False)
+                return
+            
+            for _ in self.iter_policy_evaluation(max_iters, eps):
+                pass
+    
+    
+    """
+    Generator version of iterative policy_evaluation that yields a snapshot
+    after every sweep, see get_snapshot_
     Parameters:
         int max_iters: maximum number of iterations allowed before convergence
         float eps: maximum distance allowed for convergence
-    Returns: None
+        bool deltas: include the changed states and their new values
+        bool copy: include copies of the full values and policy
+    Returns:
+        generator of snapshot dicts
     """
-    def policy_evaluation(self, max_iters=100, eps=.001):
+    def iter_policy_evaluation(self, max_iters=100, eps=.001, deltas=False,
+                               copy=False):
         
         i = 0
         diff_size = np.inf
@@ -267,20 +1230,34 @@ class MDP:
             prev_values = self.values
             self.values = self.evaluate_policy_values()
             diff = prev_values - self.values
-            diff_size = np.sqrt(diff.dot(diff))
             i+=1
+            snapshot = self.get_snapshot_(i, diff, deltas, copy)
+            diff_size = snapshot['residual']
+            yield snapshot
     
     
     """
     Find optimal policy given current values
+    Parameters:
+        float eps: if positive, actions whose values are within eps of the
+                   best action are treated as ties and the current policy is
+                   kept for them
     Returns:
         boolean indicating whether the policy has converged
     """
-    def policy_improvement(self):
+    def policy_improvement(self, eps=0):
         
-        prev_policy = self.policy
-        self.policy = self.optimize_policy()
-        stable = np.all(prev_policy == self.policy)
+        with self.stats.phase('argmax'):
+            prev_policy = self.policy
+            action_values = self.get_action_values_(self.values)
+            self.policy = action_values.argmax(axis=1).astype(
+                    self.policy_dtype, copy=False)
+            if eps > 0:
+                prev_values = action_values[
+                        np.arange(action_values.shape[0]), prev_policy]
+                keep = prev_values >= action_values.max(axis=1) - eps
+                self.policy[keep] = np.asarray(prev_policy)[keep]
+            stable = np.all(prev_policy == self.policy)
         return stable
     
     
@@ -288,47 +1265,267 @@ class MDP:
     Find optimal set values and policies for each state via policy iteration
     Parameters:
         int max_iters: maximum number of iterations allowed before convergence
-        float eps: maximum distance allowed for convergence
+        str method: policy evaluation method, see policy_evaluation
     Returns: None
     """
-    def policy_iteration(self, max_iters=100):
+    def policy_iteration(self, max_iters=100, method='iterative'):
+        
+        with self.stats.phase('policy_iteration'):
+            i = 0
+            for snapshot in self.iter_policy_iteration(max_iters, method):
+                i = snapshot['iteration']
+        if self.stats.enabled:
+            self.stats.count('policy_iteration_iterations', i)
+            self.stats.gauge('bellman_residual', self.get_bellman_residual())
+    
+    
+    """
+    Modified policy iteration: each iteration improves the policy with one
+    Bellman backup, then partially evaluates it with a fixed number of
+    sweeps of the policy's own backup instead of evaluating it to
+    convergence. With 0 sweeps this is value iteration, and as sweeps grow
+    it approaches policy iteration. With eliminate, actions that the span
+    of the last change proves suboptimal (Puterman, 6.7) are dropped, and
+    states with a single remaining action are only backed up for that
+    action from then on. The test only drops actions once the span is
+    small, so on grids it mostly adds the cost of backing up subsets
+    Parameters:
+        int sweeps: number of partial evaluation sweeps per iteration
+        int max_iters: maximum number of iterations allowed before convergence
+        float eps: tolerance of the stopping rule
+        str stop: stopping rule, see is_converged_; values that meet the
+                  'span' rule are moved by get_span_offset_. Defaults to
+                  'span' for discounts below 1 and to 'l2' otherwise
+        bool eliminate: drop provably suboptimal actions; needs discount < 1
+    Returns:
+        dict with the method, the number of iterations, the number of single
+        state backups (improvement and evaluation), the number of state
+        action values computed and the wall-clock seconds taken
+    """
+    def modified_policy_iteration(self, sweeps=5, max_iters=1000, eps=.001,
+                                  stop=None, eliminate=False):
+        
+        start = time.perf_counter()
+        if stop is None:
+            stop = 'span' if self.discount < 1 else 'l2'
+        n_states, n_actions = self.transitions.shape
+        eliminate = eliminate and self.discount < 1
+        values = np.array(self.values, dtype=self.dtype)
+        policy = np.array(self.policy, dtype=self.policy_dtype)
+        # states with more than one action left, the states with one and the
+        # mask of the actions left, None until an action is eliminated
+        undecided = None
+        decided = np.zeros(0, dtype=int)
+        active = None
+        
+        i = 0
+        backups = 0
+        action_backups = 0
+        converged = False
+        while i < max_iters and not converged:
+            with self.stats.phase('argmax'):
+                action_values = self.get_action_values_(values,
+                                                        states=undecided)
+                if active is not None:
+                    action_values[~active[undecided]] = -np.inf
+                best = action_values.max(axis=1)
+                if undecided is None:
+                    policy = action_values.argmax(axis=1).astype(
+                            self.policy_dtype, copy=False)
+                    new_values = best
+                else:
+                    new_values = np.empty_like(values)
+                    new_values[decided] = self.get_action_values_(
+                            values, policy[decided], decided)
+                    policy[undecided] = action_values.argmax(axis=1)
+                    new_values[undecided] = best
+            backups += n_states
+            action_backups += decided.size + action_values.size
+            change = new_values - values
+            converged = self.is_converged_(change, eps, stop)
+            values = new_values
+            i+=1
+            if converged:
+                if stop == 'span':
+                    values += self.get_span_offset_(change)
+                break
+            
+            if eliminate:
+                gap = (self.discount/(1 - self.discount)
+                       * (max(change.max(), 0) - min(change.min(), 0)))
+                keep = action_values >= best[:,None] - gap
+                if not keep.all():
+                    if active is None:
+                        active = keep
+                        undecided = np.arange(n_states)
+                    else:
+                        active[undecided] = keep
+                    left = keep.sum(axis=1) > 1
+                    decided = np.union1d(decided, undecided[~left])
+                    undecided = undecided[left]
+            
+            for _ in range(sweeps):
+                values = self.get_action_values_(values, policy)
+            backups += sweeps*n_states
+            action_backups += sweeps*n_states
+        
+        self.values = values
+        self.policy = policy
+        seconds = time.perf_counter() - start
+        if self.stats.enabled:
+            self.stats.add_time('modified_policy_iteration', seconds)
+            self.stats.count('modified_policy_iteration_iterations', i)
+            self.stats.count('backups', backups)
+            self.stats.gauge('bellman_residual', self.get_bellman_residual())
+        return {'method': 'modified', 'iterations': i, 'backups': backups,
+                'action_backups': action_backups, 'seconds': seconds}
+    
+    
+    """
+    Generator version of policy_iteration that yields a snapshot after every
+    evaluation and improvement step, see get_snapshot_. Snapshots also hold
+    the number of states whose policy changed and whether it is stable
+    Parameters:
+        int max_iters: maximum number of iterations allowed before convergence
+        str method: policy evaluation method, see policy_evaluation
+        bool deltas: include the changed states and their new values
+        bool copy: include copies of the full values and policy
+    Returns:
+        generator of snapshot dicts
+    """
+    def iter_policy_iteration(self, max_iters=100, method='iterative',
+                              deltas=False, copy=False):
         
         stable = False
         i = 0
+        # exact solves leave round-off noise between equally good actions,
+        # which would otherwise make the policy flip between them forever
+        eps = 0 if method == 'iterative' else 1e-9
         while i < max_iters and not stable:
-            self.policy_evaluation()
-            stable = self.policy_improvement()
+            prev_values = self.values
+            prev_policy = self.policy
+            self.policy_evaluation(method=method)
+            stable = self.policy_improvement(eps)
             i+=1
+            snapshot = self.get_snapshot_(i, prev_values - self.values,
+                                          deltas, copy)
+            snapshot['policy_changed'] = int(
+                    np.count_nonzero(prev_policy != self.policy))
+            snapshot['stable'] = bool(stable)
+            yield snapshot
             
             
+    """
+    Solve many MDPs that share this grid layout (size and blocked states)
+    but differ in their per-state rewards and discount, all in one
+    vectorized loop over a (batch, #states) array of values. Items stop
+    being updated once they have converged
+    Parameters:
+        array reward_matrix: array of shape (batch, #states) of per-destination
+                             rewards, e.g. from get_rewards_ for each dict
+        array discounts: a single discount or one per item
+        str algorithm: 'value_iteration' or 'policy_iteration'
+        int max_iters: maximum number of iterations allowed before convergence
+        float eps: maximum distance allowed for convergence
+    Returns:
+        tuple (values, policy, iterations) of arrays of shape (batch, #states),
+        (batch, #states) and (batch), where iterations counts the sweeps (for
+        value iteration) or policy improvements (for policy iteration) spent
+        on each item
+    """
+    def solve_batch(self, reward_matrix, discounts,
+                    algorithm='value_iteration', max_iters=100, eps=.001):
+        
+        reward_matrix = np.atleast_2d(np.asarray(reward_matrix, dtype=float))
+        batch, n_states = reward_matrix.shape
+        discounts = np.broadcast_to(
+                np.asarray(discounts, dtype=float), (batch,)
+            )
+        values = np.zeros((batch, n_states))
+        iterations = np.zeros(batch, dtype=int)
+        # (#actions, #states) so that maxima over actions reduce whole rows
+        transitions = np.ascontiguousarray(self.transitions.T)
+        
+        def action_values(items, values):
+            target = np.zeros((len(items), n_states+1))
+            target[:,:-1] = reward_matrix[items] + discounts[items,None]*values
+            return target[:,transitions]
+        
+        if algorithm == 'value_iteration':
+            i = 0
+            active = np.arange(batch)
+            while i < max_iters and active.size:
+                new_values = action_values(active, values[active]).max(axis=1)
+                diff = values[active] - new_values
+                values[active] = new_values
+                iterations[active] += 1
+                active = active[np.sqrt((diff*diff).sum(axis=1)) > eps]
+                i+=1
+            policy = action_values(np.arange(batch), values).argmax(axis=1)
+        
+        elif algorithm == 'policy_iteration':
+            policy = np.random.randint(
+                    0,
+                    self.actions.shape[0]-1,
+                    size=(batch, n_states)
+                )
+            i = 0
+            active = np.arange(batch)
+            while i < max_iters and active.size:
+                next_states = self.transitions[np.arange(n_states), policy[active]]
+                evaluating = np.arange(active.size)
+                for _ in range(max_iters):
+                    items = active[evaluating]
+                    target = np.zeros((len(items), n_states+1))
+                    target[:,:-1] = (reward_matrix[items]
+                                     + discounts[items,None]*values[items])
+                    new_values = np.take_along_axis(
+                            target, next_states[evaluating], axis=1)
+                    diff = values[items] - new_values
+                    values[items] = new_values
+                    evaluating = evaluating[
+                            np.sqrt((diff*diff).sum(axis=1)) > eps]
+                    if not evaluating.size:
+                        break
+                
+                new_policy = action_values(active, values[active]).argmax(axis=1)
+                stable = (new_policy == policy[active]).all(axis=1)
+                policy[active] = new_policy
+                iterations[active] += 1
+                active = active[~stable]
+                i+=1
+        
+        else:
+            raise ValueError(f"unknown algorithm '{algorithm}'")
+        return values, policy, iterations
+    
+    
     def get_total_rewards(self):
         
-        expanded_values = self.expand_array_(self.actions, self.values)
-        total_rewards = self.rewards + expanded_values
-        return total_rewards[0,0]
+        return self.state_rewards + self.values
         
             
     def get_grid_total_rewards(self):
         
-        total_rewards = self.get_total_rewards()
-        grid_values = np.zeros(shape=(self.size, self.size))
-        for i in range(len(total_rewards)):
-            x,y = self.states[i]
-            grid_values[x][y] = total_rewards[i]
-        return grid_values
+        # get_states_ orders states by x then y, so a reshape lays them out
+        # as grid[x][y]
+        return self.get_total_rewards().reshape(self.size, self.size)
         
         
     def get_grid_policy(self):
         
-        grid_values = np.zeros(shape=(self.size, self.size))
-        for i in range(len(self.values)):
-            x,y = self.states[i]
-            grid_values[x][y] = self.policy[i]
-        return grid_values
+        return np.asarray(self.policy, dtype=float).reshape(self.size, self.size)
 
     
+    """
+    Plot a heatmap of total rewards over the grid. Requires seaborn, which
+    is only imported here so that the solver does not depend on it
+    Returns: None
+    """
     def plot_grid_values(self):
         
+        import seaborn as sns
+        
         grid = self.get_grid_total_rewards()
         sns.heatmap(np.round(grid,2), annot=True, cbar=False)
 
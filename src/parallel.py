@@ -0,0 +1,145 @@
+import concurrent.futures
+import time
+from multiprocessing import shared_memory, util
+
+import numpy as np
+
+from mdp import MDP
+
+
+# shared memory blocks attached by this worker process, by block name
+_attached = {}
+
+
+"""
+Copy the structural arrays of a layout into shared memory blocks
+Parameters:
+    dict layout: arrays as returned by MDP.get_layout_
+Returns:
+    tuple (blocks, descriptors) of the SharedMemory objects, which the
+    caller must close and unlink, and picklable (name, shape, dtype)
+    descriptors of each array keyed like the layout
+"""
+def share_layout(layout):
+
+    blocks = []
+    descriptors = {}
+    for key, array in layout.items():
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        descriptors[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, descriptors
+
+
+"""
+Attach to a shared layout from within a worker process. Blocks stay
+attached for the lifetime of the worker so later tasks reuse them, and are
+closed by detach_layouts when it exits
+Parameters:
+    dict descriptors: descriptors as returned by share_layout
+Returns:
+    dict of read-only arrays backed by shared memory
+"""
+def attach_layout(descriptors):
+
+    layout = {}
+    for key, (name, shape, dtype) in descriptors.items():
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype, buffer=_attached[name].buf)
+        array.flags.writeable = False
+        layout[key] = array
+    return layout
+
+
+"""
+Close every block attached by attach_layout in this process. Blocks whose
+memory is still referenced by live arrays are left to the operating
+system, which releases them when the process exits
+"""
+def detach_layouts():
+
+    for name in list(_attached):
+        try:
+            _attached.pop(name).close()
+        except BufferError:
+            pass
+
+
+"""
+Set up a worker process of solve_parallel to detach its shared layouts
+when it exits
+"""
+def init_worker():
+
+    # workers leave through multiprocessing's exit handler, which runs
+    # finalizers but not atexit functions
+    util.Finalize(None, detach_layouts, exitpriority=0)
+
+
+"""
+Solve a single configuration in a worker process
+Parameters:
+    int index: position of the configuration in the submitted sequence
+    dict config: MDP keyword arguments; 'size' and 'blocked_states_list'
+                 select the shared layout
+    dict descriptors: descriptors of the shared layout
+    str algorithm: name of the MDP solver method to call
+    dict solver_kwargs: keyword arguments for the solver method
+Returns:
+    dict with the index, values, policy and solve seconds
+"""
+def solve_config(index, config, descriptors, algorithm, solver_kwargs):
+
+    start = time.perf_counter()
+    mdp = MDP(layout=attach_layout(descriptors), **config)
+    getattr(mdp, algorithm)(**solver_kwargs)
+    return {'index': index, 'values': mdp.values, 'policy': mdp.policy,
+            'seconds': time.perf_counter() - start}
+
+
+"""
+Solve many MDP configurations across a process pool. Configurations that
+share a grid size and set of blocked states share one copy of the
+structural arrays in shared memory, so only the configuration itself is
+pickled per task. Results are yielded as they complete, not in order
+Parameters:
+    list configs: each element is a dict of MDP keyword arguments
+                  (state_rewards_dict, blocked_states_list, discount, size)
+    int max_workers: number of worker processes; defaults to the CPU count
+    str algorithm: 'value_iteration' or 'policy_iteration'
+    dict solver_kwargs: keyword arguments passed to the solver method
+Returns:
+    generator of result dicts with keys 'index', 'values', 'policy' and
+    'seconds', where index is the position of the configuration in configs
+"""
+def solve_parallel(configs, max_workers=None, algorithm='value_iteration',
+                   solver_kwargs=None):
+
+    solver_kwargs = solver_kwargs or {}
+    blocks = []
+    shared = {}
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers, initializer=init_worker) as executor:
+            futures = []
+            for index, config in enumerate(configs):
+                size = config.get('size', 10)
+                blocked_states_list = config.get('blocked_states_list', [])
+                key = (size, frozenset(map(tuple, blocked_states_list)))
+                if key not in shared:
+                    layout = MDP({}, blocked_states_list, size=size).layout
+                    layout_blocks, shared[key] = share_layout(layout)
+                    blocks.extend(layout_blocks)
+                futures.append(executor.submit(
+                        solve_config, index, config, shared[key], algorithm,
+                        solver_kwargs
+                    ))
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+
+# solvers whose result depends on the initial policy as well as the values
+POLICY_ALGORITHMS = ('policy_evaluation', 'policy_iteration')
+
+# part of every key; bump it whenever a change to the solvers or to the
+# stored format changes the cached results, so old entries are not served
+CACHE_VERSION = 1
+
+
+class ResultCache:
+    
+    """
+    On-disk cache of solved values and policies, so that repeated solves of
+    the same MDP, also across server restarts, become a file lookup. Each
+    entry is a directory holding values.npy and policy.npy, named by a hash
+    of the cache version, grid size, rewards, blocked states, discount,
+    initial values, solver and solver arguments. Cached arrays are
+    memory-mapped read-only. When the entries exceed max_bytes the least
+    recently used are removed. The counters are guarded by a lock, so a
+    cache can be shared between threads
+    Parameters:
+        str directory: directory holding the entries, created if missing
+        int max_bytes: maximum total size of the stored arrays
+    """
+    def __init__(self, directory, max_bytes=2**28):
+        
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    
+    """
+    Return the hex digest identifying the result of solving mdp
+    Parameters:
+        MDP mdp: MDP in the state the solver is started from
+        str algorithm: name of the MDP solver method
+        dict solver_kwargs: keyword arguments for the solver method
+    Returns:
+        str
+    """
+    def get_key_(self, mdp, algorithm, solver_kwargs):
+        
+        digest = hashlib.sha256()
+        digest.update(repr((CACHE_VERSION, mdp.size, float(mdp.discount),
+                            algorithm, sorted(solver_kwargs.items()))).encode())
+        arrays = [mdp.rewards, mdp.blocked_states, mdp.values]
+        if algorithm in POLICY_ALGORITHMS:
+            arrays.append(mdp.policy)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(repr((array.dtype.str, array.shape)).encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+    
+    
+    """
+    Solve mdp in place with one of its solver methods unless the result is
+    cached, in which case its values and policy are set from the cache
+    Parameters:
+        MDP mdp: MDP to solve
+        str algorithm: name of the MDP solver method, e.g. 'value_iteration'
+                       or 'policy_iteration'
+        solver_kwargs: keyword arguments for the solver method
+    Returns:
+        boolean indicating whether the result was found in the cache
+    """
+    def solve(self, mdp, algorithm='value_iteration', **solver_kwargs):
+        
+        key = self.get_key_(mdp, algorithm, solver_kwargs)
+        entry = os.path.join(self.directory, key)
+        try:
+            values = np.load(os.path.join(entry, 'values.npy'), mmap_mode='r')
+            policy = np.load(os.path.join(entry, 'policy.npy'), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            values = None
+        if values is not None:
+            try:
+                os.utime(entry)
+            except FileNotFoundError:
+                # evicted by another thread or process after it was loaded
+                values = None
+        if values is not None:
+            with self.lock:
+                self.hits += 1
+            mdp.values, mdp.policy = values, policy
+            return True
+        
+        with self.lock:
+            self.misses += 1
+        getattr(mdp, algorithm)(**solver_kwargs)
+        self.store_(entry, mdp.values, mdp.policy)
+        self.evict_()
+        return False
+    
+    
+    """
+    Write an entry to a temporary directory and move it into place, so
+    that concurrent readers never see a partly written entry
+    """
+    def store_(self, entry, values, policy):
+        
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            np.save(os.path.join(tmp, 'values.npy'), np.asarray(values))
+            np.save(os.path.join(tmp, 'policy.npy'), np.asarray(policy))
+            os.rename(tmp, entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+    
+    
+    """
+    Return (last access time, bytes, path) of every stored entry
+    """
+    def entries_(self):
+        
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, f))
+                           for f in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except FileNotFoundError:
+                continue
+        return entries
+    
+    
+    """
+    Remove the least recently used entries until the stored arrays fit in
+    max_bytes
+    """
+    def evict_(self):
+        
+        entries = sorted(self.entries_())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            with self.lock:
+                self.evictions += 1
+    
+    
+    def clear(self):
+        
+        for _, _, entry in self.entries_():
+            shutil.rmtree(entry, ignore_errors=True)
+    
+    
+    """
+    Return the hit, miss and eviction counters, the number of entries and
+    their total size in bytes
+    """
+    def stats(self):
+        
+        entries = self.entries_()
+        with self.lock:
+            counters = {'hits': self.hits, 'misses': self.misses,
+                        'evictions': self.evictions}
+        return {**counters, 'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries)}
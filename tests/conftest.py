@@ -0,0 +1,55 @@
+"""
+Fixtures shared by the tests. The modules under src, app and benchmarks
+are imported by name, the way the app and the benchmark scripts import
+them.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+path = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(path, '..', 'src'))
+sys.path.append(os.path.join(path, '..', 'app'))
+# grids are built with the example_mdp_args helper of the benchmark scripts
+sys.path.append(os.path.join(path, '..', 'benchmarks'))
+
+
+# reward models and layouts every solver is checked on
+VARIANTS = ('state rewards', 'action rewards', 'compact float32')
+
+
+"""
+Return the MDP keyword arguments of one of VARIANTS for a size x size grid
+"""
+def get_variant(name, size, seed=0):
+    
+    if name == 'action rewards':
+        rng = np.random.default_rng(seed)
+        return {'rewards': rng.random((size**2, 5))}
+    if name == 'compact float32':
+        return {'compact': True, 'dtype': np.float32}
+    return {}
+
+
+"""
+Return the absolute tolerance of values computed in the dtype of mdp
+"""
+def get_tolerance(mdp, tolerance=1e-9):
+    
+    return 1e-3 if mdp.dtype == np.float32 else tolerance
+
+
+@pytest.fixture(params=VARIANTS)
+def variant(request):
+    
+    # called with the grid size
+    return lambda size: get_variant(request.param, size)
+
+
+@pytest.fixture(autouse=True)
+def seed():
+    
+    # initial policies are random
+    np.random.seed(0)
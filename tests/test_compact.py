@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+MODES = {
+    'float32': {'dtype': np.float32},
+    'compact': {'compact': True},
+    'compact float32': {'compact': True, 'dtype': np.float32},
+}
+
+SOLVERS = {
+    'jacobi': lambda mdp: mdp.value_iteration(200, 1e-6),
+    'gauss-seidel': lambda mdp: mdp.value_iteration(200, 1e-6,
+                                                    method='gauss-seidel'),
+    'frontier': lambda mdp: mdp.value_iteration(200, 1e-6, method='frontier'),
+    'policy_iteration': lambda mdp: mdp.policy_iteration(method='direct'),
+}
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('solver', SOLVERS)
+def test_compact_solutions_match_default(mode, solver):
+    
+    args = (*example_mdp_args(30), .95, 30)
+    np.random.seed(0)
+    default = MDP(*args)
+    SOLVERS[solver](default)
+    np.random.seed(0)
+    mdp = MDP(*args, **MODES[mode])
+    SOLVERS[solver](mdp)
+    if mdp.dtype == np.float64:
+        assert np.array_equal(mdp.values, default.values)
+        assert np.array_equal(mdp.policy, default.policy)
+    else:
+        # float32 values must be within a relative tolerance of the largest
+        tolerance = 1e-4*np.abs(default.values).max()
+        assert np.abs(mdp.values - default.values).max() <= tolerance
+
+
+def test_compact_dtypes():
+    
+    mdp = MDP(*example_mdp_args(30), .95, 30, compact=True, dtype=np.float32)
+    assert mdp.transitions.dtype == np.uint16
+    assert mdp.policy.dtype == np.uint8
+    assert mdp.values.dtype == np.float32
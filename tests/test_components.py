@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from components import solve_components
+from mdp import MDP
+
+
+SOLVERS = {
+    'value_iteration': {'max_iters': 1000},
+    'policy_iteration': {'method': 'direct'},
+}
+
+
+"""
+Solve the full grid and its components from the same initial policy and
+return the largest difference between the exact values of the two greedy
+policies
+"""
+def get_difference(mdp_args, kwargs, algorithm, max_workers=None):
+    
+    np.random.seed(0)
+    full = MDP(*mdp_args, **kwargs)
+    getattr(full, algorithm)(**SOLVERS[algorithm])
+    np.random.seed(0)
+    split = MDP(*mdp_args, **kwargs)
+    solve_components(split, algorithm, max_workers, **SOLVERS[algorithm])
+    for mdp in (full, split):
+        mdp.policy_evaluation(method='direct')
+    return np.abs(full.values - split.values).max()
+
+
+@pytest.mark.parametrize('algorithm', SOLVERS)
+@pytest.mark.parametrize('density', [0, .3, .45])
+def test_components_match_full_solve(variant, density, algorithm):
+    
+    mdp_args = (*example_mdp_args(40, density), .95, 40)
+    assert get_difference(mdp_args, variant(40), algorithm) <= 1e-3
+
+
+def test_sparse_action_rewards():
+    
+    # most states cannot reach a rewarding action and are pruned
+    rng = np.random.default_rng(0)
+    rewards = rng.random((1600, 5))*(rng.random((1600, 5)) < .01)
+    mdp_args = (*example_mdp_args(40, .3), .95, 40)
+    assert get_difference(mdp_args, {'rewards': rewards},
+                          'value_iteration') <= 1e-3
+
+
+def test_worker_processes():
+    
+    mdp_args = (*example_mdp_args(40, .45), .95, 40)
+    assert get_difference(mdp_args, {}, 'value_iteration', 2) <= 1e-3
+
+
+def test_grid_methods_are_rejected():
+    
+    mdp = MDP(*example_mdp_args(10), .95, 10)
+    with pytest.raises(ValueError):
+        solve_components(mdp, method='multigrid')
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from grid_world import make_grid_world
+from mdp import MDP
+
+
+# a 3x3 grid with two blocked cells, rendered by the original per-cell
+# renderer with its colour map
+TOTAL_REWARDS = np.array([0., 1.5, .257, 2., -1., .333, 1.5, 0., 3.14159])
+POLICY = np.array([0, 1, 2, 3, 4, 0, 1, 2, 3])
+BLOCKED_STATES_LIST = [(1, 1), (2, 0)]
+COLORS = [['#e06d00', '#59a300', 'gray'],
+          ['#8cb200', 'gray', '#e06d00'],
+          ['#d98300', '#d68a00', '#008000']]
+VALUES = [['0.0', '2.0', ''],
+          ['1.5', '', '0.0'],
+          ['0.26', '0.33', '3.14']]
+ARROWS = [['&larr;', '&darr;', ''],
+          ['&rarr;', '', '&uarr;'],
+          ['&uarr;', '&larr;', '&darr;']]
+
+
+def get_table(labels):
+    
+    rows = ''.join(
+            '<tr>' + ''.join(
+                f"<td align='center' id='{x}{y}' "
+                f"style='background-color:{COLORS[y][x]}'>{labels[y][x]}</td>"
+                for x in range(3)) + '</tr>'
+            for y in range(3))
+    return f'<table>{rows}</table>'
+
+
+@pytest.mark.parametrize('show_policy,labels', [(False, VALUES),
+                                                (True, ARROWS)])
+def test_output_is_unchanged(show_policy, labels):
+    
+    states = MDP({}, [], 1, 3).states
+    html = make_grid_world(states, TOTAL_REWARDS, POLICY, BLOCKED_STATES_LIST,
+                           show_policy)
+    assert html == get_table(labels)
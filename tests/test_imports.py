@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import path
+
+
+HEAVY = ['seaborn', 'matplotlib', 'pandas', 'scipy']
+
+CHILD = """
+import sys
+import {module}
+print(' '.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+# the solver modules load plotting and scipy lazily, only where they are used
+@pytest.mark.parametrize('module', ['mdp', 'layout_cache', 'parallel'])
+def test_no_heavy_imports(module):
+    
+    out = subprocess.run(
+            [sys.executable, '-c', CHILD.format(module=module, heavy=HEAVY)],
+            cwd=os.path.join(path, '..', 'src'),
+            capture_output=True, text=True, check=True
+        )
+    assert out.stdout.split() == []
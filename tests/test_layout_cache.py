@@ -0,0 +1,34 @@
+import concurrent.futures
+
+import numpy as np
+
+from common import example_mdp_args
+from layout_cache import LayoutCache
+from mdp import MDP
+
+
+def test_cached_mdp_matches_mdp():
+    
+    cache = LayoutCache()
+    args = (*example_mdp_args(12), .9, 12)
+    for _ in range(2):
+        cached = cache.get_mdp(*args)
+        cached.value_iteration()
+    mdp = MDP(*args)
+    mdp.value_iteration()
+    assert np.array_equal(cached.values, mdp.values)
+    assert cache.stats()['hits'] == 2
+
+
+def test_concurrent_lookups_with_evictions():
+    
+    # more layouts than entries, so threads keep evicting each other's keys
+    cache = LayoutCache(maxsize=2)
+    def build(i):
+        return cache.get_mdp({(0, 0): i % 5}, [(1, i % 7)], .9, 6)
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        mdps = list(executor.map(build, range(400)))
+    stats = cache.stats()
+    assert len(mdps) == 400
+    assert stats['hits'] + stats['misses'] == 800
+    assert stats['layouts'] <= 2 and stats['rewards'] <= 2
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+def test_multigrid_leaves_random_state_alone():
+    
+    mdp = MDP(*example_mdp_args(64), .99, 64)
+    state = np.random.get_state()
+    mdp.value_iteration(1000, method='multigrid')
+    after = np.random.get_state()
+    assert state[0] == after[0] and np.array_equal(state[1], after[1])
+    assert state[2:] == after[2:]
+
+
+@pytest.mark.parametrize('density', [0, .1, .3])
+def test_multigrid_values_match_exact(variant, density):
+    
+    kwargs = variant(64)
+    mdp_args = (*example_mdp_args(64, density), .99, 64)
+    mdp = MDP(*mdp_args, **kwargs)
+    result = mdp.value_iteration(5000, method='multigrid')
+    if 'rewards' in kwargs:
+        # action rewards have no coarse counterpart
+        assert result['method'] == 'jacobi'
+        return
+    exact = MDP(*mdp_args, **kwargs)
+    exact.value_iteration(method='shortest-path')
+    assert np.abs(mdp.values - exact.values).max() <= .01
+    assert [level['size'] for level in result['levels']] == [16, 32, 64]
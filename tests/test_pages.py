@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import app
+
+app.app.secret_key = 'test'
+
+PAGES = ['/', '/value_iteration', '/policy_iteration']
+
+
+@pytest.fixture
+def client(monkeypatch):
+    
+    monkeypatch.setattr(app, 'page_cache', {})
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_revalidation_returns_not_modified(client, page):
+    
+    first = client.get(page)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.data
+    second = client.get(page, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    stale = client.get(page, headers={'If-None-Match': '"stale"'})
+    assert stale.status_code == 200
+    assert stale.data == first.data
+
+
+def test_pages_are_rendered_without_cache(client, monkeypatch):
+    
+    # pages start from a random policy
+    np.random.seed(0)
+    cached = client.get('/value_iteration')
+    monkeypatch.setattr(app, 'cache_pages', False)
+    np.random.seed(0)
+    rendered = client.get('/value_iteration')
+    assert 'ETag' not in rendered.headers
+    assert rendered.data == cached.data
+    assert list(app.page_cache) == ['value_iteration']
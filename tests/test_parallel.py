@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import parallel
+from common import example_mdp_args
+from mdp import MDP
+
+
+SOLVERS = {
+    'value_iteration': {'max_iters': 1000},
+    'policy_iteration': {'method': 'direct'},
+}
+
+
+"""
+Return configurations over two layouts, with varying rewards and discounts
+"""
+def get_configs(size=12):
+    
+    configs = []
+    for density in (0, .2):
+        state_rewards_dict, blocked_states_list = example_mdp_args(size,
+                                                                   density)
+        for discount in (.5, .9, .95):
+            configs.append({'state_rewards_dict': state_rewards_dict,
+                            'blocked_states_list': blocked_states_list,
+                            'discount': discount, 'size': size})
+    return configs
+
+
+@pytest.mark.parametrize('algorithm', SOLVERS)
+def test_parallel_matches_serial(algorithm):
+    
+    configs = get_configs()
+    results = list(parallel.solve_parallel(configs, 2, algorithm,
+                                           SOLVERS[algorithm]))
+    assert sorted(result['index'] for result in results) == \
+        list(range(len(configs)))
+    for result in results:
+        mdp = MDP(**configs[result['index']])
+        getattr(mdp, algorithm)(**SOLVERS[algorithm])
+        assert np.allclose(result['values'], mdp.values, rtol=0, atol=1e-9)
+
+
+def test_detach_layouts_closes_blocks():
+    
+    layout = MDP(*example_mdp_args(6), size=6).layout
+    blocks, descriptors = parallel.share_layout(layout)
+    try:
+        attached = parallel.attach_layout(descriptors)
+        assert np.array_equal(attached['transitions'], layout['transitions'])
+        del attached
+        parallel.detach_layouts()
+        assert parallel._attached == {}
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
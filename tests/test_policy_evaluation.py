@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+"""
+Return an MDP whose policy is partly optimized, so that it has the long
+chains towards the rewards that a random policy lacks, and whose values
+are reset to 0
+"""
+def partly_solved(size, discount):
+    
+    mdp = MDP(*example_mdp_args(size), discount, size)
+    mdp.value_iteration(30)
+    mdp.values = np.zeros_like(mdp.values)
+    return mdp
+
+
+@pytest.mark.parametrize('discount', [.99, .999])
+def test_policy_values_solve_bellman_equation(discount):
+    
+    mdp = partly_solved(40, discount)
+    mdp.policy_evaluation(method='direct')
+    values = mdp.values
+    assert np.abs(mdp.evaluate_policy_values() - values).max() < 1e-6
+    assert values.max() == pytest.approx(1/(1 - discount))
+
+
+def test_unknown_method():
+    
+    mdp = partly_solved(10, .9)
+    with pytest.raises(ValueError):
+        mdp.policy_evaluation(method='krylov')
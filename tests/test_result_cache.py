@@ -0,0 +1,58 @@
+import concurrent.futures
+import os
+
+import numpy as np
+
+import result_cache
+from common import example_mdp_args
+from mdp import MDP
+from result_cache import ResultCache
+
+
+def test_solve_hits_after_store(tmp_path):
+    
+    cache = ResultCache(str(tmp_path))
+    args = (*example_mdp_args(10), .9, 10)
+    solved = MDP(*args)
+    assert not cache.solve(solved)
+    cached = MDP(*args)
+    assert cache.solve(cached)
+    assert np.array_equal(cached.values, solved.values)
+
+
+def test_version_change_misses(tmp_path, monkeypatch):
+    
+    cache = ResultCache(str(tmp_path))
+    args = (*example_mdp_args(10), .9, 10)
+    cache.solve(MDP(*args))
+    monkeypatch.setattr(result_cache, 'CACHE_VERSION',
+                        result_cache.CACHE_VERSION + 1)
+    assert not cache.solve(MDP(*args))
+    assert cache.stats()['entries'] == 2
+
+
+def test_entry_evicted_after_loading_is_a_miss(tmp_path, monkeypatch):
+    
+    cache = ResultCache(str(tmp_path))
+    args = (*example_mdp_args(10), .9, 10)
+    cache.solve(MDP(*args))
+    def utime(entry):
+        raise FileNotFoundError(entry)
+    monkeypatch.setattr(os, 'utime', utime)
+    assert not cache.solve(MDP(*args))
+    assert cache.stats()['misses'] == 2
+
+
+def test_concurrent_solves_with_evictions(tmp_path):
+    
+    # room for two entries, so threads keep evicting each other's
+    cache = ResultCache(str(tmp_path), max_bytes=4000)
+    def solve(i):
+        mdp = MDP({(0, 0): 1 + i % 5}, [], .9, 10)
+        return cache.solve(mdp, max_iters=5)
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        hits = list(executor.map(solve, range(200)))
+    stats = cache.stats()
+    assert stats['hits'] == sum(hits)
+    assert stats['hits'] + stats['misses'] == 200
+    assert stats['evictions'] > 0
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+SIZE = 8
+
+
+"""
+Return the dense (#states, #actions, #states) transition model the MDP used
+to be built with: moves off the low edge stay on it, and moves off the high
+edge or into a blocked state lead nowhere
+"""
+def get_dense_transitions(mdp):
+    
+    states = mdp.states.astype(int)
+    moved = np.maximum(states[:,None] + mdp.actions.astype(int)[None], 0)
+    transitions = (moved[:,:,None] == states[None,None]).all(axis=3)
+    return transitions*(mdp.blocked_states == 1)[None,None]
+
+
+"""
+Return a reward array of the given number of dimensions and the matching
+dense (#states, #actions, #states) rewards
+"""
+def get_rewards(ndim, seed=0):
+    
+    rng = np.random.default_rng(seed)
+    shape = (SIZE**2, 5, SIZE**2)[:ndim]
+    rewards = rng.random(shape)*(rng.random(shape) < .2)
+    # per-destination rewards are gained on entering a state and per-action
+    # rewards whatever state the action leads to
+    if ndim == 1:
+        dense = rewards[None,None]
+    elif ndim == 2:
+        dense = rewards[:,:,None]
+    else:
+        dense = rewards
+    return rewards, np.broadcast_to(dense, (SIZE**2, 5, SIZE**2))
+
+
+@pytest.mark.parametrize('ndim', [1, 2, 3])
+def test_action_values_match_dense_backup(ndim):
+    
+    rewards, dense_rewards = get_rewards(ndim)
+    mdp = MDP({}, example_mdp_args(SIZE, .2)[1], .9, SIZE, rewards=rewards)
+    transitions = get_dense_transitions(mdp)
+    values = np.random.default_rng(1).random(SIZE**2)
+    expected = (transitions*(dense_rewards + .9*values)).sum(axis=2)
+    assert np.allclose(mdp.get_action_values_(values), expected,
+                       rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('ndim', [1, 2, 3])
+def test_value_iteration_matches_dense_value_iteration(ndim):
+    
+    rewards, dense_rewards = get_rewards(ndim)
+    mdp = MDP({}, example_mdp_args(SIZE, .2)[1], .9, SIZE, rewards=rewards)
+    mdp.value_iteration(50, 0)
+    transitions = get_dense_transitions(mdp)
+    values = np.zeros(SIZE**2)
+    for _ in range(50):
+        values = (transitions*(dense_rewards + .9*values)).sum(axis=2).max(
+                axis=1)
+    assert np.allclose(mdp.values, values, rtol=0, atol=1e-12)
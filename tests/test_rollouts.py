@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from conftest import get_tolerance
+from mdp import MDP
+from rollouts import simulate
+
+
+DISCOUNT = .95
+HORIZON = 400
+
+
+@pytest.fixture
+def solved(variant):
+    
+    mdp = MDP(*example_mdp_args(30, .2), DISCOUNT, 30, **variant(30))
+    mdp.policy_iteration(method='direct')
+    return mdp
+
+
+def test_returns_match_policy_values(solved):
+    
+    result = simulate(solved, episodes=2, horizon=HORIZON)
+    solved.policy_evaluation(method='direct')
+    truncation = DISCOUNT**HORIZON*np.abs(solved.values).max()
+    tolerance = truncation + get_tolerance(solved)
+    assert np.abs(result['returns'] - solved.values[:,None]).max() <= tolerance
+
+
+def test_noisy_returns_are_not_above_optimal(solved):
+    
+    result = simulate(solved, episodes=50, horizon=HORIZON, noise=.3, seed=0)
+    tolerance = get_tolerance(solved)
+    assert (result['returns'] - solved.values[:,None]).max() <= tolerance
+
+
+def test_starts_must_be_states():
+    
+    mdp = MDP(*example_mdp_args(10), DISCOUNT, 10)
+    result = simulate(mdp, [(0, 0), (9, 9)], episodes=3, horizon=5)
+    assert result['returns'].shape == (2, 3)
+    with pytest.raises(ValueError):
+        simulate(mdp, [(10, 0)])
+
+
+def test_steps_count_live_episodes():
+    
+    # moving right leaves the grid after 3, 2 and 1 steps
+    mdp = MDP({}, [], DISCOUNT, 3, policy=np.ones(9, dtype=int))
+    result = simulate(mdp, [(0, 0), (1, 0), (2, 0)], episodes=4, horizon=10)
+    assert result['steps'] == 4*(3 + 2 + 1)
@@ -0,0 +1,73 @@
+import concurrent.futures
+import json
+
+import numpy as np
+
+import app
+import sessions
+from common import example_mdp_args
+
+app.app.secret_key = 'test'
+
+
+def create_session(client, size=6):
+    
+    state_rewards_dict, blocked_states_list = example_mdp_args(size)
+    data = {'size': size,
+            'state_rewards_list': [[list(k), v] for k, v
+                                   in state_rewards_dict.items()],
+            'blocked_states_list': [list(s) for s in blocked_states_list],
+            'discount': .9,
+            'values': [0]*size**2,
+            'policy': [0]*size**2}
+    response = client.post('/session', data=json.dumps(data))
+    return json.loads(response.data)['session_id']
+
+
+def test_steps_send_changed_cells():
+    
+    client = app.app.test_client()
+    session_id = create_session(client)
+    url = f'/session/{session_id}/value_iteration_step'
+    first = json.loads(client.post(url).data)
+    second = json.loads(client.post(url).data)
+    assert len(first['rendered']) == 36
+    assert 0 < len(second['rendered']) < 36
+    x, y, color, label = second['rendered'][0]
+    assert color.startswith('#') or color == 'gray'
+    
+    policy = json.loads(client.post(f'/session/{session_id}/show_policy').data)
+    assert policy['cells'] == []
+    assert {label for *_, label in policy['rendered']} <= set(
+            app.grid_world.POLICY_LABELS) | {''}
+
+
+def test_concurrent_steps_are_serialized():
+    
+    client = app.app.test_client()
+    session_id = create_session(client)
+    url = f'/session/{session_id}/value_iteration_step'
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda _: client.post(url), range(20)))
+    
+    mdp = app.sessions.get(session_id)['mdp']
+    expected = app.MDP(*example_mdp_args(6), .9, 6, values=np.zeros(36))
+    for _ in range(20):
+        expected.values = expected.evaluate_values()
+    assert np.array_equal(mdp.values, expected.values)
+
+
+def test_sessions_expire_after_ttl(monkeypatch):
+    
+    now = [1000.]
+    monkeypatch.setattr(sessions.time, 'monotonic', lambda: now[0])
+    store = sessions.SessionStore(ttl=10)
+    kept = store.create('kept')
+    expired = store.create('expired')
+    now[0] += 6
+    assert store.get(kept) == 'kept'
+    now[0] += 6
+    # the access refreshed kept, while expired was last seen 12 s ago
+    assert store.get(expired) is None
+    assert store.get(kept) == 'kept'
+    assert store.backend.keys() == [kept]
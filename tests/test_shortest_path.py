@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from conftest import get_tolerance, get_variant
+from mdp import MDP
+
+
+SIZE = 30
+
+
+def get_cases(size, seed=0):
+    
+    rng = np.random.default_rng(seed)
+    state_rewards_dict, blocked_states_list = example_mdp_args(size, .2, seed)
+    cell = tuple(int(c) for c in rng.integers(0, size, 2))
+    return {
+        'two rewards': (state_rewards_dict, blocked_states_list, {}),
+        'one reward': ({(size - 1, size - 1): 2}, blocked_states_list, {}),
+        'no reward': ({}, blocked_states_list, {}),
+        'reward on blocked': ({**state_rewards_dict, cell: 5},
+                              blocked_states_list + [cell], {}),
+        'compact float32': (state_rewards_dict, blocked_states_list,
+                            get_variant('compact float32', size)),
+        'stencil': (state_rewards_dict, blocked_states_list,
+                    {'backend': 'stencil'}),
+    }
+
+
+def get_fallbacks(size, seed=0):
+    
+    state_rewards_dict, blocked_states_list = example_mdp_args(size, .2, seed)
+    return {
+        'unequal rewards': ({(0, 0): 1, (size//2, size//2): 2},
+                            blocked_states_list, {}),
+        'negative reward': ({(0, 0): 1, (size//2, size//2): -1},
+                            blocked_states_list, {}),
+        'action rewards': (state_rewards_dict, blocked_states_list,
+                           get_variant('action rewards', size, seed)),
+        'discount 1': (state_rewards_dict, blocked_states_list,
+                       {'discount': 1}),
+    }
+
+
+@pytest.mark.parametrize('discount', [0, .5, .95])
+@pytest.mark.parametrize('case', get_cases(SIZE))
+def test_shortest_path_gives_optimal_values(case, discount):
+    
+    *mdp_args, kwargs = get_cases(SIZE)[case]
+    kwargs = {'discount': discount, **kwargs}
+    exact = MDP(*mdp_args, size=SIZE, **kwargs)
+    assert exact.value_iteration(method='shortest-path')['method'] \
+        == 'shortest-path'
+    converged = MDP(*mdp_args, size=SIZE, **kwargs)
+    converged.value_iteration(max_iters=10000, eps=1e-12)
+    tolerance = get_tolerance(exact, 1e-6)
+    assert np.abs(exact.values - converged.values).max() <= tolerance
+    
+    # the exact value of the greedy policy must be the optimal value
+    exact.policy_evaluation(method='direct')
+    assert np.abs(exact.values - converged.values).max() <= tolerance
+
+
+@pytest.mark.parametrize('case', get_fallbacks(SIZE))
+def test_shortest_path_falls_back_to_jacobi(case):
+    
+    *mdp_args, kwargs = get_fallbacks(SIZE)[case]
+    kwargs = {'discount': .95, **kwargs}
+    np.random.seed(0)
+    fallback = MDP(*mdp_args, size=SIZE, **kwargs)
+    result = fallback.value_iteration(method='shortest-path')
+    np.random.seed(0)
+    jacobi = MDP(*mdp_args, size=SIZE, **kwargs)
+    jacobi.value_iteration()
+    assert result['method'] == 'jacobi'
+    assert np.array_equal(fallback.values, jacobi.values)
+    assert np.array_equal(fallback.policy, jacobi.policy)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+SIZE = 15
+DISCOUNTS = [.5, .9, .99]
+
+
+"""
+Return the blocked states of the shared layout and a (batch, #states)
+matrix of sparse per-state rewards, one row per discount
+"""
+def get_batch(seed=0):
+    
+    _, blocked_states_list = example_mdp_args(SIZE, .2, seed)
+    rng = np.random.default_rng(seed)
+    shape = (len(DISCOUNTS), SIZE**2)
+    reward_matrix = rng.random(shape)*(rng.random(shape) < .05)
+    return blocked_states_list, reward_matrix
+
+
+def test_value_iteration_batch_matches_items():
+    
+    blocked_states_list, reward_matrix = get_batch()
+    mdp = MDP({}, blocked_states_list, 1, SIZE)
+    values, policy, iterations = mdp.solve_batch(reward_matrix, DISCOUNTS,
+                                                 max_iters=1000, eps=1e-6)
+    for i, discount in enumerate(DISCOUNTS):
+        item = MDP({}, blocked_states_list, discount, SIZE,
+                   rewards=reward_matrix[i])
+        result = item.value_iteration(1000, 1e-6)
+        assert np.allclose(values[i], item.values, rtol=0, atol=1e-12)
+        assert iterations[i] == result['iterations']
+        assert np.array_equal(policy[i], item.policy)
+    # converged items stop being updated
+    assert len(set(iterations)) == len(DISCOUNTS)
+
+
+def test_policy_iteration_batch_matches_items():
+    
+    blocked_states_list, reward_matrix = get_batch()
+    mdp = MDP({}, blocked_states_list, 1, SIZE)
+    values, policy, iterations = mdp.solve_batch(
+            reward_matrix, DISCOUNTS, 'policy_iteration', 1000, 1e-10)
+    for i, discount in enumerate(DISCOUNTS):
+        item = MDP({}, blocked_states_list, discount, SIZE,
+                   rewards=reward_matrix[i])
+        item.policy_iteration(method='direct')
+        assert np.allclose(values[i], item.values, rtol=0, atol=1e-6)
+    assert len(set(iterations)) > 1
+
+
+def test_unknown_algorithm():
+    
+    blocked_states_list, reward_matrix = get_batch()
+    mdp = MDP({}, blocked_states_list, 1, SIZE)
+    with pytest.raises(ValueError):
+        mdp.solve_batch(reward_matrix, .9, 'q_learning')
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+SOLVERS = {
+    'value_iteration': lambda mdp: mdp.value_iteration(),
+    'policy_evaluation': lambda mdp: mdp.policy_evaluation(),
+    'policy_iteration': lambda mdp: mdp.policy_iteration(max_iters=10),
+    'modified 20': lambda mdp: mdp.modified_policy_iteration(20, 100),
+}
+
+
+"""
+Solve with one backend, then unblock and block a cell and run a few more
+sweeps, and return the values and policy
+"""
+def solve(backend, kwargs, solver, size=30):
+    
+    mdp_args = example_mdp_args(size, .2)
+    np.random.seed(0)
+    mdp = MDP(*mdp_args, .95, size, backend=backend, **kwargs)
+    SOLVERS[solver](mdp)
+    mdp.set_blocked(mdp_args[1][0], False)
+    mdp.set_blocked((size//3, size//3))
+    mdp.value_iteration(10)
+    return mdp.values, mdp.policy
+
+
+@pytest.mark.parametrize('solver', SOLVERS)
+def test_stencil_matches_table(variant, solver):
+    
+    kwargs = variant(30)
+    table_values, table_policy = solve('table', kwargs, solver)
+    values, policy = solve('stencil', kwargs, solver)
+    assert np.array_equal(values, table_values)
+    assert np.array_equal(policy, table_policy)
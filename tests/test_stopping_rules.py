@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from mdp import MDP
+
+
+# the l2 rule only sees that nothing changes after a second backup
+@pytest.mark.parametrize('stop,iterations', [('l2', 2), ('sup', 1),
+                                             ('span', 1)])
+def test_value_iteration_without_discount(stop, iterations):
+    
+    mdp = MDP({(1, 1): 1}, [], 0, 4)
+    result = mdp.value_iteration(stop=stop)
+    assert result['iterations'] == iterations
+    assert np.array_equal(mdp.values, mdp.evaluate_values())
+
+
+def test_modified_policy_iteration_without_discount():
+    
+    mdp = MDP({(1, 1): 1}, [], 0, 4)
+    assert mdp.modified_policy_iteration()['iterations'] == 1
+    assert mdp.values.max() == 1
+
+
+def test_modified_policy_iteration_default_stop_without_discount_below_1():
+    
+    mdp = MDP(*example_mdp_args(8), 1, 8)
+    assert mdp.modified_policy_iteration(max_iters=20)['iterations'] == 20
+    with pytest.raises(ValueError):
+        mdp.modified_policy_iteration(stop='span')
+
+
+@pytest.mark.parametrize('stop', ['sup', 'span'])
+def test_stopping_rules_bound_suboptimality(stop):
+    
+    exact = MDP(*example_mdp_args(20), .95, 20)
+    exact.value_iteration(method='shortest-path')
+    mdp = MDP(*example_mdp_args(20), .95, 20)
+    mdp.modified_policy_iteration(eps=.01, stop=stop)
+    mdp.policy_evaluation(method='direct')
+    assert np.abs(mdp.values - exact.values).max() <= .01
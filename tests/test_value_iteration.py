@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from common import example_mdp_args
+from conftest import get_tolerance
+from mdp import MDP
+
+
+SIZE = 12
+
+
+"""
+Return the values of value iteration with the Jacobi method run to
+convergence
+"""
+def converged(mdp_args, kwargs):
+    
+    mdp = MDP(*mdp_args, **kwargs)
+    mdp.value_iteration(10000, 1e-12)
+    return mdp.values
+
+
+@pytest.mark.parametrize('discount', [.5, .95])
+@pytest.mark.parametrize('method', ['gauss-seidel', 'prioritized',
+                                    'frontier'])
+def test_methods_match_jacobi(variant, method, discount):
+    
+    mdp_args = (*example_mdp_args(SIZE, .2), discount, SIZE)
+    kwargs = variant(SIZE)
+    mdp = MDP(*mdp_args, **kwargs)
+    result = mdp.value_iteration(10000, 1e-9, method=method)
+    assert result['method'] == method
+    values = converged(mdp_args, kwargs)
+    tolerance = get_tolerance(mdp, 1e-6)
+    assert np.abs(mdp.values - values).max() <= tolerance
+    
+    # the exact value of the greedy policy must be the optimal value
+    mdp.policy_evaluation(method='direct')
+    assert np.abs(mdp.values - values).max() <= tolerance
+
+
+def test_prioritized_sweeping_backs_up_fewer_states():
+    
+    mdp_args = (*example_mdp_args(SIZE, .2), .95, SIZE)
+    jacobi = MDP(*mdp_args).value_iteration(10000, 1e-6)
+    prioritized = MDP(*mdp_args).value_iteration(10000, 1e-6,
+                                                 method='prioritized')
+    assert prioritized['backups'] < jacobi['backups']